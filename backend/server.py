@@ -15,28 +15,44 @@ STORAGE: AWS S3 (no database required)
 AI: Gemini 3 Flash for intelligent analysis
 """
 
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Query, Depends, Security
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, Security, Request, Response
 from fastapi.security import APIKeyHeader
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError, NoCredentialsError
 import os
 import logging
-import json
+import gzip
+import io
+import orjson
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, field_validator
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterator, Literal
+from dataclasses import dataclass
+from contextlib import aclosing
+from functools import lru_cache
+from operator import itemgetter
 import uuid
 from datetime import datetime, timezone, timedelta
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
+from jinja2 import Environment, DictLoader, select_autoescape
+from markupsafe import Markup
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import httpx
 import hashlib
+import heapq
+import random
 import secrets
+import asyncio
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables FIRST
 ROOT_DIR = Path(__file__).parent
@@ -46,7 +62,20 @@ load_dotenv(ROOT_DIR / '.env')
 import google.generativeai as genai
 
 # Create the main app
-app = FastAPI(title="AWS Cost AI Agent", version="3.1.0")
+# orjson handles the large dict lists (history, anomalies, previews) much faster than stdlib json
+app = FastAPI(title="AWS Cost AI Agent", version="3.1.0", default_response_class=ORJSONResponse)
+
+# Allowed CORS origins, parsed once; whitespace after commas would otherwise never match.
+# A frozenset makes the per-request origin check a hash lookup instead of a list scan
+CORS_ORIGINS = frozenset(o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o.strip())
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_credentials=True,
+    allow_origins=CORS_ORIGINS,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -99,6 +128,31 @@ async def verify_api_key(api_key: str = Security(API_KEY_HEADER)) -> bool:
 
 # ==================== AI/LLM SERVICE ====================
 
+# How long an AI answer is reused for the same (rounded) input, e.g. preview then weekly run
+AI_CACHE_TTL = float(os.environ.get('AI_CACHE_TTL', 24 * 3600))
+# Max Gemini requests in flight across the weekly job, previews and API endpoints
+AI_CONCURRENCY = int(os.environ.get('AI_CONCURRENCY', 10))
+
+def _summarize_org(all_teams_data: List[Dict]) -> Dict[str, Any]:
+    """
+    Org-wide totals, top spenders and top anomalies in one pass over the teams.
+    Callers that need it several times (summary, recommendations, admin email)
+    compute it once and pass it along as `org`.
+    """
+    total_current = total_previous = 0
+    for t in all_teams_data:
+        total_current += t.get('current_month_cost', 0)
+        total_previous += t.get('previous_month_cost', 0)
+    
+    return {
+        'total_current': total_current,
+        'total_previous': total_previous,
+        'change': ((total_current - total_previous) / total_previous * 100) if total_previous > 0 else 0,
+        'top_spenders': heapq.nlargest(10, all_teams_data, key=lambda x: x.get('current_month_cost', 0)),
+        'top_anomalies': heapq.nlargest(5, (t for t in all_teams_data if t.get('is_anomaly')),
+                                        key=lambda x: x.get('percentage_change', 0))
+    }
+
 class CostAIService:
     """
     AI-powered cost analysis using Google Gemini.
@@ -116,6 +170,13 @@ class CostAIService:
             self.model = genai.GenerativeModel(self.model_name)
         else:
             self.model = None
+        # One model per distinct system prompt, with the prompt sent as system_instruction
+        self._models: Dict[str, Any] = {}
+        # {key: (expires, result)} for AI answers, see _cache_key
+        self._result_cache: Dict[str, tuple] = {}
+        self._semaphore = asyncio.Semaphore(AI_CONCURRENCY)
+        # {(system_prompt, prompt): task} for Gemini requests currently in flight
+        self._inflight: Dict[tuple, asyncio.Task] = {}
     
     def _get_datadog_links(self, account_id: str) -> Dict[str, str]:
         """Generate Datadog dashboard links for an account"""
@@ -127,14 +188,62 @@ class CostAIService:
             "service_breakdown": f"{base}/cost/analytics?groupBy=service&filter=account_id:{account_id}"
         }
     
+    @staticmethod
+    def _cache_key(kind: str, payload: Any) -> str:
+        """Key per prompt kind over a canonical form of the input, so near-identical data reuses an answer"""
+        return f"{kind}:" + hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    @classmethod
+    def prediction_key(cls, historical_data: List[Dict], team_name: str) -> str:
+        """Key over what the prediction prompt uses: each record's month and whole-dollar cost"""
+        return cls._cache_key("prediction", [
+            team_name, sorted((d.get('month', ''), round(d.get('total_cost', 0))) for d in historical_data)
+        ])
+    
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        cached = self._result_cache.get(key)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del self._result_cache[key]
+            return None
+        # Shallow copy: callers add keys to the returned dict (e.g. 'prediction')
+        return dict(cached[1])
+    
+    def _cache_put(self, key: str, result: Dict):
+        self._result_cache[key] = (time.monotonic() + AI_CACHE_TTL, result)
+    
+    def clear_cache(self):
+        self._result_cache.clear()
+    
+    def _model_for(self, system_prompt: str):
+        """Get the model configured with this system prompt, creating it once per process"""
+        if not system_prompt:
+            return self.model
+        model = self._models.get(system_prompt)
+        if model is None:
+            model = genai.GenerativeModel(self.model_name, system_instruction=system_prompt)
+            self._models[system_prompt] = model
+        return model
+    
     async def _generate_content(self, prompt: str, system_prompt: str = "") -> str:
-        """Generate content using Gemini"""
+        """Generate content using Gemini; concurrent identical prompts share one request"""
         if not self.model:
             return ""
         
+        key = (system_prompt, prompt)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request_content(prompt, system_prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one caller going away doesn't cancel the request the others are waiting on
+        return await asyncio.shield(task)
+    
+    async def _request_content(self, prompt: str, system_prompt: str) -> str:
         try:
-            full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-            response = await self.model.generate_content_async(full_prompt)
+            async with self._semaphore:
+                response = await self._model_for(system_prompt).generate_content_async(prompt)
             return response.text
         except Exception as e:
             logger.error(f"Gemini generation error: {e}")
@@ -149,6 +258,19 @@ class CostAIService:
             logger.warning("Gemini API key not configured, returning basic analysis")
             return self._basic_analysis(team_data)
         
+        # Whole-dollar costs and the top 5 services: cent-level drift doesn't warrant a new answer
+        current_services = team_data.get('service_breakdown', {})
+        previous_services = team_data.get('previous_service_breakdown', {})
+        cache_key = self._cache_key("anomaly", [
+            team_data.get('team_name'), team_data.get('aws_account_id'),
+            round(team_data.get('current_month_cost', 0)), round(team_data.get('previous_month_cost', 0)),
+            sorted((svc, round(cost), round(previous_services.get(svc, 0)))
+                   for svc, cost in heapq.nlargest(5, current_services.items(), key=lambda x: x[1]))
+        ])
+        cached = self._cache_get(cache_key)
+        if cached:
+            return cached
+        
         try:
             system_prompt = """You are an AWS cost optimization expert. Analyze the provided cost data and:
 1. Explain WHY costs changed (be specific about services)
@@ -163,10 +285,10 @@ Previous Month: ${team_data.get('previous_month_cost', 0):,.2f}
 Change: {team_data.get('percentage_change', 0):.1f}%
 
 Service Breakdown (Current):
-{json.dumps(team_data.get('service_breakdown', {}), indent=2)}
+{orjson.dumps(team_data.get('service_breakdown', {})).decode()}
 
 Service Breakdown (Previous):
-{json.dumps(team_data.get('previous_service_breakdown', {}), indent=2)}
+{orjson.dumps(team_data.get('previous_service_breakdown', {})).decode()}
 
 Provide:
 1. Root cause analysis (why did costs change?)
@@ -176,12 +298,14 @@ Provide:
             response = await self._generate_content(prompt, system_prompt)
             
             if response:
-                return {
+                result = {
                     "ai_analysis": response,
                     "analysis_type": "gemini-1.5-flash",
                     "datadog_links": self._get_datadog_links(team_data.get('aws_account_id', '')),
                     "generated_at": datetime.now(timezone.utc).isoformat()
                 }
+                self._cache_put(cache_key, result)
+                return dict(result)
             else:
                 return self._basic_analysis(team_data)
             
@@ -196,6 +320,11 @@ Provide:
         if not self.api_key or len(historical_data) < 2:
             return self._basic_prediction(historical_data)
         
+        cache_key = self.prediction_key(historical_data, team_name)
+        cached = self._cache_get(cache_key)
+        if cached:
+            return cached
+        
         try:
             system_prompt = """You are an AWS cost forecasting expert. Based on historical cost data, predict next month's costs.
 Provide a specific dollar amount prediction with confidence level and reasoning."""
@@ -220,12 +349,14 @@ Provide:
             response = await self._generate_content(prompt, system_prompt)
             
             if response:
-                return {
+                result = {
                     "prediction": response,
                     "model": "gemini-1.5-flash",
                     "historical_months_analyzed": len(historical_data),
                     "generated_at": datetime.now(timezone.utc).isoformat()
                 }
+                self._cache_put(cache_key, result)
+                return result
             else:
                 return self._basic_prediction(historical_data)
             
@@ -233,7 +364,8 @@ Provide:
             logger.error(f"Cost prediction failed: {e}")
             return self._basic_prediction(historical_data)
     
-    async def generate_optimization_recommendations(self, all_teams_data: List[Dict]) -> Dict[str, Any]:
+    async def generate_optimization_recommendations(self, all_teams_data: List[Dict],
+                                                    org: Optional[Dict] = None) -> Dict[str, Any]:
         """
         Generate organization-wide optimization recommendations.
         """
@@ -246,24 +378,22 @@ Analyze cost data across multiple accounts and provide strategic recommendations
 Focus on high-impact, actionable items."""
             
             # Summarize all teams data
-            total_current = sum(t.get('current_month_cost', 0) for t in all_teams_data)
-            total_previous = sum(t.get('previous_month_cost', 0) for t in all_teams_data)
-            
-            top_spenders = sorted(all_teams_data, key=lambda x: x.get('current_month_cost', 0), reverse=True)[:10]
-            top_anomalies = sorted([t for t in all_teams_data if t.get('is_anomaly')], 
-                                   key=lambda x: x.get('percentage_change', 0), reverse=True)[:5]
+            org = org or _summarize_org(all_teams_data)
+            total_current = org['total_current']
+            top_spenders = org['top_spenders']
+            top_anomalies = org['top_anomalies']
             
             prompt = f"""Analyze this AWS Organization cost summary ({len(all_teams_data)} accounts):
 
 Total Current Month: ${total_current:,.2f}
-Total Previous Month: ${total_previous:,.2f}
-Overall Change: {((total_current - total_previous) / total_previous * 100) if total_previous > 0 else 0:.1f}%
+Total Previous Month: ${org['total_previous']:,.2f}
+Overall Change: {org['change']:.1f}%
 
 Top 10 Spending Teams:
-{json.dumps([{'team': t['team_name'], 'cost': t['current_month_cost'], 'change': t['percentage_change']} for t in top_spenders], indent=2)}
+{orjson.dumps([{'team': t['team_name'], 'cost': t['current_month_cost'], 'change': t['percentage_change']} for t in top_spenders]).decode()}
 
 Top Anomalies (cost spikes):
-{json.dumps([{'team': t['team_name'], 'cost': t['current_month_cost'], 'change': t['percentage_change']} for t in top_anomalies], indent=2)}
+{orjson.dumps([{'team': t['team_name'], 'cost': t['current_month_cost'], 'change': t['percentage_change']} for t in top_anomalies]).decode()}
 
 Provide:
 1. Top 5 organization-wide cost optimization opportunities
@@ -289,31 +419,31 @@ Provide:
             logger.error(f"Optimization recommendations failed: {e}")
             return {"recommendations": f"Error generating recommendations: {str(e)}"}
     
-    async def generate_executive_summary(self, all_teams_data: List[Dict], all_anomalies: List[Dict]) -> str:
+    async def generate_executive_summary(self, all_teams_data: List[Dict], all_anomalies: List[Dict],
+                                         org: Optional[Dict] = None) -> str:
         """
         Generate an AI-powered executive summary for admin reports.
         """
         if not self.api_key:
-            return self._basic_executive_summary(all_teams_data, all_anomalies)
+            return self._basic_executive_summary(all_teams_data, all_anomalies, org)
         
         try:
             system_prompt = """You are a CFO's assistant writing cost reports. 
 Write concise, executive-friendly summaries with clear action items.
 Use professional language suitable for C-level executives."""
             
-            total_current = sum(t.get('current_month_cost', 0) for t in all_teams_data)
-            total_previous = sum(t.get('previous_month_cost', 0) for t in all_teams_data)
+            org = org or _summarize_org(all_teams_data)
             
             prompt = f"""Write a brief executive summary for this AWS cost report:
 
 Organization: {len(all_teams_data)} AWS accounts
-Current Month Spend: ${total_current:,.2f}
-Previous Month Spend: ${total_previous:,.2f}
-Month-over-Month Change: {((total_current - total_previous) / total_previous * 100) if total_previous > 0 else 0:.1f}%
+Current Month Spend: ${org['total_current']:,.2f}
+Previous Month Spend: ${org['total_previous']:,.2f}
+Month-over-Month Change: {org['change']:.1f}%
 Cost Anomalies Detected: {len(all_anomalies)}
 
 Top anomalies:
-{json.dumps([{'team': a.get('team_name'), 'change': a.get('percentage_change')} for a in all_anomalies[:5]], indent=2)}
+{orjson.dumps([{'team': a.get('team_name'), 'change': a.get('percentage_change')} for a in all_anomalies[:5]]).decode()}
 
 Write a 3-4 sentence executive summary highlighting:
 1. Overall cost trend
@@ -321,11 +451,11 @@ Write a 3-4 sentence executive summary highlighting:
 3. Recommended immediate actions"""
 
             response = await self._generate_content(prompt, system_prompt)
-            return response if response else self._basic_executive_summary(all_teams_data, all_anomalies)
+            return response if response else self._basic_executive_summary(all_teams_data, all_anomalies, org)
             
         except Exception as e:
             logger.error(f"Executive summary generation failed: {e}")
-            return self._basic_executive_summary(all_teams_data, all_anomalies)
+            return self._basic_executive_summary(all_teams_data, all_anomalies, org)
     
     def _basic_analysis(self, team_data: Dict) -> Dict[str, Any]:
         """Fallback basic analysis without AI"""
@@ -333,16 +463,15 @@ Write a 3-4 sentence executive summary highlighting:
         current = team_data.get('service_breakdown', {})
         previous = team_data.get('previous_service_breakdown', {})
         
-        # Find biggest changes
+        # Find biggest changes (only the top 3 are needed, so no full sort)
         changes = []
         for service, cost in current.items():
             prev_cost = previous.get(service, 0)
             if prev_cost > 0:
-                service_change = ((cost - prev_cost) / prev_cost) * 100
-                changes.append((service, service_change, cost - prev_cost))
+                diff = cost - prev_cost
+                changes.append((service, diff / prev_cost * 100, diff))
         
-        changes.sort(key=lambda x: abs(x[2]), reverse=True)
-        top_changes = changes[:3]
+        top_changes = heapq.nlargest(3, changes, key=lambda x: abs(x[2]))
         
         analysis = f"Cost {'increased' if change > 0 else 'decreased'} by {abs(change):.1f}%.\n\n"
         analysis += "Top cost changes:\n"
@@ -371,13 +500,13 @@ Write a 3-4 sentence executive summary highlighting:
             "generated_at": datetime.now(timezone.utc).isoformat()
         }
     
-    def _basic_executive_summary(self, all_teams_data: List[Dict], all_anomalies: List[Dict]) -> str:
+    def _basic_executive_summary(self, all_teams_data: List[Dict], all_anomalies: List[Dict],
+                                 org: Optional[Dict] = None) -> str:
         """Fallback basic executive summary"""
-        total_current = sum(t.get('current_month_cost', 0) for t in all_teams_data)
-        total_previous = sum(t.get('previous_month_cost', 0) for t in all_teams_data)
-        change = ((total_current - total_previous) / total_previous * 100) if total_previous > 0 else 0
+        org = org or _summarize_org(all_teams_data)
+        change = org['change']
         
-        return f"""This month's AWS spend across {len(all_teams_data)} accounts totaled ${total_current:,.2f}, 
+        return f"""This month's AWS spend across {len(all_teams_data)} accounts totaled ${org['total_current']:,.2f}, 
 {'an increase' if change > 0 else 'a decrease'} of {abs(change):.1f}% from last month. 
 {len(all_anomalies)} accounts showed unusual cost patterns requiring attention.
 Configure GEMINI_API_KEY for detailed AI-powered insights."""
@@ -387,6 +516,25 @@ ai_service = CostAIService()
 
 # ==================== S3 STORAGE SERVICE ====================
 
+# Defaults for a fresh notification config, parsed from the environment once at import
+DEFAULT_NOTIFICATION_CONFIG = {
+    'anomaly_threshold': float(os.environ.get('ANOMALY_THRESHOLD', 20.0)),
+    'schedule_day': os.environ.get('SCHEDULE_DAY', 'monday'),
+    'schedule_hour': int(os.environ.get('SCHEDULE_HOUR', 9)),
+    'global_admin_emails': [e.strip() for e in os.environ.get('ADMIN_EMAILS', '').split(',') if e.strip()],
+    'ai_enabled': True
+}
+
+# Size of the rolling costs/latest.json; unfiltered history reads up to this limit are served from it
+LATEST_COSTS_SIZE = 500
+
+# Bodies above this size are uploaded with multipart instead of a single PutObject
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+# Sentinel from conditional GETs whose object is unchanged (S3 answered 304)
+NOT_MODIFIED = object()
+# How often each process re-lists year/month partitions to repair an index that missed a write
+PARTITION_INDEX_RELIST = float(os.environ.get('PARTITION_INDEX_RELIST', 3600))
+
 class S3Storage:
     """
     S3-based storage for all application data.
@@ -400,6 +548,33 @@ class S3Storage:
         self.local_storage_dir = Path('/app/backend/data')
         self.use_s3 = False
         self.s3_client = None
+        # Parallel GETs for history scans; S3 read throughput plateaus around 16 in-flight requests
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='s3-fetch')
+        # TTL cache for the small, hot teams/config objects: key -> (loaded_at, data, etag).
+        # Other processes' writes become visible after at most STORAGE_CACHE_TTL seconds (0 disables);
+        # once expired, an entry with a known ETag is revalidated with a conditional GET
+        self._cache: Dict[str, tuple] = {}
+        self._cache_ttl = float(os.environ.get('STORAGE_CACHE_TTL', 60))
+        self._teams_by_id: tuple = (None, {})
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Rolling newest-N cost records so the dashboard's default read is a single GET
+        self._transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_THRESHOLD,
+            max_concurrency=10
+        )
+        self._latest_costs_key = 'costs/latest.json'
+        self._latest_costs_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._index_listed_at: Dict[str, float] = {}
+        # One client shared by all threads: the pool must cover the fetch fan-out (default is 10),
+        # and adaptive retries absorb 503 SlowDown during bursts
+        self._client_config = BotoConfig(
+            max_pool_connections=64,
+            retries={'mode': 'adaptive', 'max_attempts': 5},
+            tcp_keepalive=True
+        )
         
         # Try to initialize S3 client
         self._init_s3_client()
@@ -415,7 +590,8 @@ class S3Storage:
                 # Check if we have IAM role credentials
                 if hasattr(credentials, 'method') and credentials.method == 'iam-role':
                     logger.info("Using IAM role for S3 access (recommended)")
-                    self.s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+                    self.s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+                                              config=self._client_config)
                     self._verify_bucket_access()
                     return
             
@@ -429,14 +605,16 @@ class S3Storage:
                     's3',
                     aws_access_key_id=aws_key,
                     aws_secret_access_key=aws_secret,
-                    region_name=os.environ.get('AWS_REGION', 'us-east-1')
+                    region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+                    config=self._client_config
                 )
                 self._verify_bucket_access()
                 return
             
             # Third try: Default credential chain (profile, env, etc.)
             try:
-                self.s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+                self.s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'),
+                                              config=self._client_config)
                 self._verify_bucket_access()
                 return
             except Exception:
@@ -495,33 +673,60 @@ class S3Storage:
     
     def _get_object(self, key: str) -> Optional[Dict]:
         if self.use_s3:
-            try:
-                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
-                return json.loads(response['Body'].read().decode('utf-8'))
-            except ClientError as e:
-                if e.response['Error']['Code'] == 'NoSuchKey':
-                    return None
-                logger.error(f"Error getting {key}: {e}")
-                return None
+            return self._get_s3_object(key)[0]
         else:
             local_path = self._get_local_path(key)
             if local_path.exists():
                 try:
-                    with open(local_path, 'r') as f:
-                        return json.load(f)
+                    return orjson.loads(local_path.read_bytes())
                 except Exception as e:
                     logger.error(f"Error reading local file {key}: {e}")
             return None
     
+    def _get_s3_object(self, key: str, etag: Optional[str] = None) -> tuple:
+        """
+        GET an S3 object as (data, etag). With `etag`, the GET is conditional and
+        (NOT_MODIFIED, etag) is returned if the object hasn't changed since.
+        """
+        try:
+            if etag:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key, IfNoneMatch=etag)
+            else:
+                response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+            body = response['Body'].read()
+            # Objects written before compression was enabled are plain JSON
+            if response.get('ContentEncoding') == 'gzip':
+                body = gzip.decompress(body)
+            return orjson.loads(body), response.get('ETag')
+        except ClientError as e:
+            code = e.response['Error']['Code']
+            if code in ('304', 'NotModified'):
+                return NOT_MODIFIED, etag
+            if code == 'NoSuchKey':
+                return None, None
+            logger.error(f"Error getting {key}: {e}")
+            return None, None
+    
     def _put_object(self, key: str, data: Dict) -> bool:
         if self.use_s3:
             try:
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=key,
-                    Body=json.dumps(data, indent=2, default=str),
-                    ContentType='application/json'
-                )
+                # Compact, gzipped JSON: level 1 gets most of the ratio on repetitive JSON for little CPU
+                body = gzip.compress(orjson.dumps(data, default=str), compresslevel=1)
+                if len(body) > MULTIPART_THRESHOLD:
+                    # Large aggregates upload as parallel multipart chunks
+                    self.s3_client.upload_fileobj(
+                        io.BytesIO(body), self.bucket_name, key,
+                        Config=self._transfer_config,
+                        ExtraArgs={'ContentType': 'application/json', 'ContentEncoding': 'gzip'}
+                    )
+                else:
+                    self.s3_client.put_object(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        Body=body,
+                        ContentType='application/json',
+                        ContentEncoding='gzip'
+                    )
                 return True
             except Exception as e:
                 logger.error(f"Error putting {key}: {e}")
@@ -530,34 +735,152 @@ class S3Storage:
             local_path = self._get_local_path(key)
             try:
                 local_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(local_path, 'w') as f:
-                    json.dump(data, f, indent=2, default=str)
+                local_path.write_bytes(orjson.dumps(data, default=str))
                 return True
             except Exception as e:
                 logger.error(f"Error writing local file {key}: {e}")
                 return False
     
-    def _list_objects(self, prefix: str) -> List[str]:
+    def _list_objects(self, prefix: str) -> Iterator[str]:
+        """Yield every key under a prefix, following list_objects_v2 pagination"""
         if self.use_s3:
             try:
-                response = self.s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-                return [obj['Key'] for obj in response.get('Contents', [])]
+                paginator = self.s3_client.get_paginator('list_objects_v2')
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix,
+                                               PaginationConfig={'PageSize': 1000}):
+                    for obj in page.get('Contents', []):
+                        yield obj['Key']
             except Exception as e:
                 logger.error(f"Error listing {prefix}: {e}")
-                return []
         else:
+            # Plain string prefix like S3: 'costs/2026/02/123' covers the '123/' folder and '123.json'
             local_path = self._get_local_path(prefix)
-            if not local_path.exists():
-                return []
+            base = local_path if prefix.endswith('/') else local_path.parent
+            if not base.is_dir():
+                return
             try:
-                files = []
-                for p in local_path.rglob('*.json'):
-                    rel_path = p.relative_to(self.local_storage_dir)
-                    files.append(str(rel_path))
-                return files
+                for p in base.rglob('*.json'):
+                    key = str(p.relative_to(self.local_storage_dir))
+                    if key.startswith(prefix):
+                        yield key
             except Exception as e:
                 logger.error(f"Error listing local files {prefix}: {e}")
+    
+    def _list_subprefixes(self, prefix: str) -> List[str]:
+        """List numeric 'folders' directly under a prefix (years or months) without listing leaf objects"""
+        if self.use_s3:
+            try:
+                paginator = self.s3_client.get_paginator('list_objects_v2')
+                subprefixes = [
+                    common['Prefix']
+                    for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix, Delimiter='/')
+                    for common in page.get('CommonPrefixes', [])
+                ]
+            except Exception as e:
+                logger.error(f"Error listing prefixes under {prefix}: {e}")
+                return []
+        else:
+            local_path = self._get_local_path(prefix)
+            if not local_path.is_dir():
                 return []
+            subprefixes = [f"{prefix}{p.name}/" for p in local_path.iterdir() if p.is_dir()]
+        return [p for p in subprefixes if p[len(prefix):-1].isdigit()]
+    
+    def _list_months(self, base_prefix: str) -> List[str]:
+        """
+        List year/month partitions under a prefix (e.g. 'costs/2026/02/'), newest first.
+        Served from the prefix's _index.json, which each process rebuilds from a real
+        listing on first use and every PARTITION_INDEX_RELIST seconds after that.
+        """
+        index = self._get_cached_object(f"{base_prefix}_index.json")
+        listed_at = self._index_listed_at.get(base_prefix)
+        if index is not None and listed_at is not None and time.monotonic() - listed_at < PARTITION_INDEX_RELIST:
+            return [f"{base_prefix}{p}/" for p in index.get('partitions', [])]
+        
+        with self._index_lock:
+            return self._relist_months(base_prefix)
+    
+    def _relist_months(self, base_prefix: str) -> List[str]:
+        """List the partitions in storage and write them to the index if it differs; caller holds _index_lock"""
+        index_key = f"{base_prefix}_index.json"
+        months = []
+        for year_prefix in self._list_subprefixes(base_prefix):
+            months.extend(self._list_subprefixes(year_prefix))
+        months.sort(reverse=True)
+        
+        partitions = [m[len(base_prefix):].rstrip('/') for m in months]
+        index = self._get_object(index_key)
+        if index is None or index.get('partitions') != partitions:
+            self._put_cached_object(index_key, {
+                'partitions': partitions,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            })
+        self._index_listed_at[base_prefix] = time.monotonic()
+        return months
+    
+    def _register_partition(self, base_prefix: str, year: str, month: str) -> None:
+        """Add a year/month to the prefix's index after a write; a no-op when it's already listed"""
+        index_key = f"{base_prefix}_index.json"
+        partition = f"{year}/{month}"
+        index = self._get_cached_object(index_key)
+        if index is not None and partition in index.get('partitions', []):
+            return
+        # Under the lock a seed in progress has either finished (and the index exists)
+        # or not started listing yet (and will see the object just written)
+        with self._index_lock:
+            index = self._get_object(index_key)
+            if index is None:
+                return
+            partitions = index.get('partitions', [])
+            if partition not in partitions:
+                self._put_cached_object(index_key, {
+                    'partitions': sorted(partitions + [partition], reverse=True),
+                    'updated_at': datetime.now(timezone.utc).isoformat()
+                })
+            else:
+                # Already indexed by another writer; refresh our stale cached copy
+                self._cache[index_key] = (time.monotonic(), index, None)
+    
+    def _account_keys(self, prefix: str, account_id: str) -> List[str]:
+        """
+        Keys holding one account's records in a partition: per-record objects under
+        {account_id}/ plus the legacy monthly {account_id}.json. One listing covers both.
+        """
+        record_prefix, legacy_key = f"{prefix}{account_id}/", f"{prefix}{account_id}.json"
+        return [k for k in self._list_objects(prefix + account_id)
+                if k == legacy_key or (k.startswith(record_prefix) and k.endswith('.json'))]
+    
+    def _read_partition(self, prefix: str, list_key: str, team_name: Optional[str] = None,
+                        account_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Fetch every object in one partition in parallel and collect its records.
+        With account_ids, only those accounts' keys are listed.
+        """
+        if account_ids:
+            keys = [k for account_id in account_ids for k in self._account_keys(prefix, account_id)]
+        else:
+            keys = [k for k in self._list_objects(prefix) if k.endswith('.json')]
+        records = []
+        for data in self._pool.map(self._get_object, keys):
+            for record in self._unwrap_records(data, list_key):
+                if team_name and record.get('team_name') != team_name:
+                    continue
+                records.append(record)
+        return records
+    
+    def _read_newest_partitions(self, base_prefix: str, list_key: str, team_name: Optional[str],
+                                limit: int, account_ids: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Read month partitions newest first, stopping once at least `limit` records are found.
+        Records land in the partition of the month they were produced, so older months
+        can't contain anything newer than what has already been collected.
+        """
+        records = []
+        for prefix in self._list_months(base_prefix):
+            records.extend(self._read_partition(prefix, list_key, team_name, account_ids))
+            if len(records) >= limit:
+                break
+        return records
     
     def _delete_object(self, key: str) -> bool:
         if self.use_s3:
@@ -577,24 +900,78 @@ class S3Storage:
                 logger.error(f"Error deleting local file {key}: {e}")
                 return False
     
+    def _delete_many(self, keys: List[str]) -> int:
+        """Delete keys in batches of 1000 (the DeleteObjects limit); returns how many were deleted"""
+        if not self.use_s3:
+            return sum(1 for key in keys if self._delete_object(key))
+        
+        deleted = 0
+        for i in range(0, len(keys), 1000):
+            chunk = keys[i:i + 1000]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': k} for k in chunk], 'Quiet': True}
+                )
+                errors = response.get('Errors', [])
+                for err in errors:
+                    logger.error(f"Error deleting {err.get('Key')}: {err.get('Message')}")
+                deleted += len(chunk) - len(errors)
+            except Exception as e:
+                logger.error(f"Error deleting batch of {len(chunk)} keys: {e}")
+        return deleted
+    
+    def _get_cached_object(self, key: str) -> Optional[Dict]:
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self._cache_ttl:
+            self.cache_hits += 1
+            return cached[1]
+        self.cache_misses += 1
+        if self.use_s3:
+            data, etag = self._get_s3_object(key, cached[2] if cached else None)
+            if data is NOT_MODIFIED:
+                # Unchanged since it was cached: keep the parsed value, restart its TTL
+                self._cache[key] = (time.monotonic(), cached[1], etag)
+                return cached[1]
+        else:
+            data, etag = self._get_object(key), None
+        if data is not None:
+            self._cache[key] = (time.monotonic(), data, etag)
+        return data
+    
+    def _put_cached_object(self, key: str, data: Dict) -> bool:
+        """Write through the cache so the next read doesn't go back to S3"""
+        if self._put_object(key, data):
+            # ETag of the new object isn't known here, so the first revalidation is a full GET
+            self._cache[key] = (time.monotonic(), data, None)
+            return True
+        self._cache.pop(key, None)
+        return False
+    
     # Teams methods
     def get_all_teams(self) -> List[Dict]:
-        data = self._get_object('teams/teams.json')
-        return data.get('teams', []) if data else []
+        data = self._get_cached_object('teams/teams.json')
+        # Copy so callers appending/filtering don't mutate the cached list
+        return list(data.get('teams', [])) if data else []
     
     def save_teams(self, teams: List[Dict]) -> bool:
-        return self._put_object('teams/teams.json', {'teams': teams, 'updated_at': datetime.now(timezone.utc).isoformat()})
+        return self._put_cached_object('teams/teams.json', {'teams': teams, 'updated_at': datetime.now(timezone.utc).isoformat()})
     
     def get_team_by_id(self, team_id: str) -> Optional[Dict]:
-        teams = self.get_all_teams()
-        for team in teams:
-            if team.get('id') == team_id:
-                return team
-        return None
+        data = self._get_cached_object('teams/teams.json')
+        if not data:
+            return None
+        # Index is tied to the cached teams object, so any reload or write rebuilds it
+        if self._teams_by_id[0] is not data:
+            self._teams_by_id = (data, {t.get('id'): t for t in data.get('teams', [])})
+        return self._teams_by_id[1].get(team_id)
     
     def add_team(self, team: Dict) -> bool:
+        return self.add_teams([team])
+    
+    def add_teams(self, new_teams: List[Dict]) -> bool:
         teams = self.get_all_teams()
-        teams.append(team)
+        teams.extend(new_teams)
         return self.save_teams(teams)
     
     def delete_team(self, team_id: str) -> bool:
@@ -602,22 +979,34 @@ class S3Storage:
         new_teams = [t for t in teams if t.get('id') != team_id]
         if len(new_teams) == len(teams):
             return False
-        return self.save_teams(new_teams)
+        if not self.save_teams(new_teams):
+            return False
+        self._delete_object(f"ai_cache/predictions/{team_id}.json")
+        return True
+    
+    def purge_cost_history(self, aws_account_id: str) -> int:
+        """Delete every cost object for an account, legacy monthly files included; returns how many were deleted"""
+        keys = []
+        for month_prefix in self._list_months("costs/"):
+            keys.extend(self._account_keys(month_prefix, aws_account_id))
+        deleted = self._delete_many(keys)
+        self._update_latest_costs(lambda records: [r for r in records if r.get('aws_account_id') != aws_account_id])
+        return deleted
     
     # Config methods - NO SECRETS STORED IN JSON
     def get_config(self) -> Dict:
-        config = self._get_object('config/notification_config.json')
-        if not config:
-            config = {
-                'id': str(uuid.uuid4()),
-                'anomaly_threshold': float(os.environ.get('ANOMALY_THRESHOLD', 20.0)),
-                'schedule_day': os.environ.get('SCHEDULE_DAY', 'monday'),
-                'schedule_hour': int(os.environ.get('SCHEDULE_HOUR', 9)),
-                'global_admin_emails': [e.strip() for e in os.environ.get('ADMIN_EMAILS', '').split(',') if e.strip()],
-                'ai_enabled': True,
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }
-            self.save_config(config)
+        config = self._get_cached_object('config/notification_config.json')
+        if config:
+            # Copy so callers updating the dict don't mutate the cached one
+            return dict(config)
+        
+        config = {
+            'id': str(uuid.uuid4()),
+            **DEFAULT_NOTIFICATION_CONFIG,
+            'global_admin_emails': list(DEFAULT_NOTIFICATION_CONFIG['global_admin_emails']),
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+        self.save_config(config)
         return config
     
     def save_config(self, config: Dict) -> bool:
@@ -625,104 +1014,180 @@ class S3Storage:
         safe_config = {k: v for k, v in config.items() 
                        if k not in ['smtp_password', 'smtp_host', 'smtp_port', 'smtp_user', 'sender_email']}
         safe_config['updated_at'] = datetime.now(timezone.utc).isoformat()
-        return self._put_object('config/notification_config.json', safe_config)
+        return self._put_cached_object('config/notification_config.json', safe_config)
+    
+    @staticmethod
+    def _unwrap_records(data: Optional[Dict], list_key: str) -> List[Dict]:
+        """Per-record objects hold the record itself; legacy monthly objects wrap a list of them"""
+        if not data:
+            return []
+        return data[list_key] if list_key in data else [data]
     
     # Cost history methods
+    # Each record is its own object (costs/{year}/{month}/{account_id}/{id}.json), so saving is a
+    # single PUT with no read-modify-write and concurrent writers can't drop each other's records.
+    # Legacy monthly files (costs/{year}/{month}/{account_id}.json with a 'records' list) are still read.
     def save_cost_record(self, cost_data: Dict) -> bool:
-        year_month = cost_data.get('month', datetime.now(timezone.utc).strftime('%Y-%m'))
-        year, month = year_month.split('-')
-        account_id = cost_data.get('aws_account_id', 'unknown')
-        key = f"costs/{year}/{month}/{account_id}.json"
-        
-        existing = self._get_object(key)
-        if existing:
-            records = existing.get('records', [])
-            records.append(cost_data)
-        else:
-            records = [cost_data]
-        
-        return self._put_object(key, {
-            'aws_account_id': account_id,
-            'month': year_month,
-            'records': records,
-            'last_updated': datetime.now(timezone.utc).isoformat()
+        return self.save_cost_records([cost_data]) == 1
+    
+    def save_cost_records(self, records: List[Dict]) -> int:
+        """
+        Save many cost records with concurrent PUTs on the fetch pool.
+        The partition index and latest.json are updated once for the whole batch.
+        Returns how many records were saved.
+        """
+        saved = self._put_partitioned(
+            "costs/", records, 'month',
+            lambda r: f"{r.get('aws_account_id', 'unknown')}/{r.get('id') or uuid.uuid4()}.json"
+        )
+        if saved:
+            self._update_latest_costs(lambda existing: saved + existing)
+        return len(saved)
+    
+    def _put_partitioned(self, base_prefix: str, items: List[Dict], month_field: str, leaf) -> List[Dict]:
+        """PUT each item under base_prefix/YYYY/MM/<leaf(item)> in parallel, register the months, return the saved items"""
+        keyed = []
+        for item in items:
+            year, month = item.get(month_field, datetime.now(timezone.utc).strftime('%Y-%m')).split('-')
+            keyed.append((year, month, f"{base_prefix}{year}/{month}/{leaf(item)}", item))
+        
+        results = list(self._pool.map(lambda k: self._put_object(k[2], k[3]), keyed))
+        
+        saved, months = [], set()
+        for (year, month, _, item), ok in zip(keyed, results):
+            if ok:
+                saved.append(item)
+                months.add((year, month))
+        for year, month in months:
+            self._register_partition(base_prefix, year, month)
+        return saved
+    
+    def _update_latest_costs(self, update) -> None:
+        """
+        Apply `update` to the latest-records list and write it back.
+        Only maintained once seeded by _get_latest_costs; until then a save has nothing to update.
+        """
+        with self._latest_costs_lock:
+            # Uncached read: the TTL copy may predate another writer's update
+            latest = self._get_object(self._latest_costs_key)
+            if latest is None:
+                return
+            self._write_latest_costs(update(list(latest.get('records', []))))
+    
+    def _write_latest_costs(self, records: List[Dict]) -> List[Dict]:
+        """Sort, dedupe and trim records into latest.json; caller holds _latest_costs_lock"""
+        records.sort(key=lambda x: x.get('fetched_at', ''), reverse=True)
+        # A seed that overlapped a save can already hold the records the save adds
+        seen = set()
+        unique = []
+        for record in records:
+            record_id = record.get('id')
+            if record_id is not None:
+                if record_id in seen:
+                    continue
+                seen.add(record_id)
+            unique.append(record)
+        unique = unique[:LATEST_COSTS_SIZE]
+        self._put_cached_object(self._latest_costs_key, {
+            'records': unique,
+            'updated_at': datetime.now(timezone.utc).isoformat()
         })
+        return unique
+    
+    def _get_latest_costs(self) -> List[Dict]:
+        """Newest LATEST_COSTS_SIZE records, seeding latest.json from the partitions on first use"""
+        latest = self._get_cached_object(self._latest_costs_key)
+        if latest is not None:
+            return latest.get('records', [])
+        
+        # Seed under the lock so a save either lands before the partitions are read
+        # or waits and merges into the seeded list
+        with self._latest_costs_lock:
+            latest = self._get_object(self._latest_costs_key)
+            if latest is not None:
+                return latest.get('records', [])
+            records = self._read_newest_partitions("costs/", 'records', None, LATEST_COSTS_SIZE)
+            return self._write_latest_costs(records)
     
     def get_cost_history(self, team_name: Optional[str] = None, month: Optional[str] = None, limit: int = 100) -> List[Dict]:
-        all_records = []
+        if not team_name and not month and limit <= LATEST_COSTS_SIZE:
+            return self._get_latest_costs()[:limit]
+        
+        # Records live under costs/YYYY/MM/{account}/ (legacy: {account}.json), so a team
+        # filter only needs to list its accounts' keys instead of the whole month
+        account_prefixes = self._team_account_ids(team_name) if team_name else None
         
         if month:
             year, mon = month.split('-')
-            prefix = f"costs/{year}/{mon}/"
+            all_records = self._read_partition(f"costs/{year}/{mon}/", 'records', team_name, account_prefixes)
         else:
-            prefix = "costs/"
-        
-        keys = self._list_objects(prefix)
-        
-        for key in keys:
-            if key.endswith('.json'):
-                data = self._get_object(key)
-                if data and 'records' in data:
-                    for record in data['records']:
-                        if team_name and record.get('team_name') != team_name:
-                            continue
-                        all_records.append(record)
+            all_records = self._read_newest_partitions("costs/", 'records', team_name, limit, account_prefixes)
         
         all_records.sort(key=lambda x: x.get('fetched_at', ''), reverse=True)
         return all_records[:limit]
     
+    def _team_account_ids(self, team_name: str) -> Optional[List[str]]:
+        """Account ids configured for a team name, or None (scan everything) if the team isn't configured"""
+        account_ids = sorted({t['aws_account_id'] for t in self.get_all_teams()
+                              if t.get('team_name') == team_name and t.get('aws_account_id')})
+        return account_ids or None
+    
     def get_team_cost_history(self, aws_account_id: str, limit: int = 12) -> List[Dict]:
         """Get cost history for a specific account"""
-        all_records = []
-        keys = self._list_objects("costs/")
-        
-        for key in keys:
-            if aws_account_id in key and key.endswith('.json'):
-                data = self._get_object(key)
-                if data and 'records' in data:
-                    all_records.extend(data['records'])
-        
+        # Only list the account's keys in each month, newest months first, until `limit` records are found
+        all_records = self._read_newest_partitions("costs/", 'records', None, limit, [aws_account_id])
         all_records.sort(key=lambda x: x.get('month', ''), reverse=True)
         return all_records[:limit]
     
-    # Anomaly methods
-    def save_anomaly(self, anomaly: Dict) -> bool:
-        year_month = anomaly.get('current_month', datetime.now(timezone.utc).strftime('%Y-%m'))
-        year, month = year_month.split('-')
-        key = f"anomalies/{year}/{month}/anomalies.json"
-        
-        existing = self._get_object(key)
-        if existing:
-            anomalies = existing.get('anomalies', [])
-            anomalies.append(anomaly)
-        else:
-            anomalies = [anomaly]
+    def get_cost_histories(self, aws_account_ids: List[str], limit: int = 12) -> Dict[str, List[Dict]]:
+        """
+        Get cost history for many accounts, grouped by account. Month partitions are read
+        newest first, one listing each, until every account has `limit` records.
+        """
+        histories = {account_id: [] for account_id in aws_account_ids}
         
-        return self._put_object(key, {
-            'month': year_month,
-            'anomalies': anomalies,
-            'last_updated': datetime.now(timezone.utc).isoformat()
-        })
+        for month_prefix in self._list_months("costs/"):
+            pending = {account_id for account_id, records in histories.items() if len(records) < limit}
+            if not pending:
+                break
+            
+            keys = []
+            for key in self._list_objects(month_prefix):
+                # Keys are {month_prefix}{account_id}/{id}.json (or legacy {account_id}.json)
+                account_id = key[len(month_prefix):].split('/')[0].removesuffix('.json')
+                if key.endswith('.json') and account_id in pending:
+                    keys.append(key)
+            
+            for data in self._pool.map(self._get_object, keys):
+                for record in self._unwrap_records(data, 'records'):
+                    account_records = histories.get(record.get('aws_account_id'))
+                    if account_records is not None:
+                        account_records.append(record)
+        
+        for records in histories.values():
+            records.sort(key=lambda x: x.get('month', ''), reverse=True)
+            del records[limit:]
+        return histories
+    
+    # Anomaly methods - one object per anomaly, like cost records
+    def save_anomaly(self, anomaly: Dict) -> bool:
+        return self.save_anomalies([anomaly]) == 1
+    
+    def save_anomalies(self, anomalies: List[Dict]) -> int:
+        """Save many anomalies with concurrent PUTs; returns how many were saved"""
+        return len(self._put_partitioned(
+            "anomalies/", anomalies, 'current_month',
+            lambda a: f"{a.get('id') or uuid.uuid4()}.json"
+        ))
     
     def get_anomalies(self, team_name: Optional[str] = None, limit: int = 50) -> List[Dict]:
-        all_anomalies = []
-        keys = self._list_objects("anomalies/")
-        
-        for key in keys:
-            if key.endswith('.json'):
-                data = self._get_object(key)
-                if data and 'anomalies' in data:
-                    for anomaly in data['anomalies']:
-                        if team_name and anomaly.get('team_name') != team_name:
-                            continue
-                        all_anomalies.append(anomaly)
-        
-        all_anomalies.sort(key=lambda x: x.get('detected_at', ''), reverse=True)
-        return all_anomalies[:limit]
+        all_anomalies = self._read_newest_partitions("anomalies/", 'anomalies', team_name, limit)
+        return heapq.nlargest(limit, all_anomalies, key=lambda x: x.get('detected_at', ''))
     
     # AI Insights storage
     def save_ai_insight(self, insight: Dict) -> bool:
-        year_month = datetime.now(timezone.utc).strftime('%Y-%m')
+        now = datetime.now(timezone.utc)
+        year_month = now.strftime('%Y-%m')
         year, month = year_month.split('-')
         key = f"ai_insights/{year}/{month}/insights.json"
         
@@ -736,21 +1201,33 @@ class S3Storage:
         return self._put_object(key, {
             'month': year_month,
             'insights': insights,
-            'last_updated': datetime.now(timezone.utc).isoformat()
+            'last_updated': now.isoformat()
         })
     
     def get_ai_insights(self, limit: int = 20) -> List[Dict]:
-        all_insights = []
-        keys = self._list_objects("ai_insights/")
-        
-        for key in keys:
-            if key.endswith('.json'):
-                data = self._get_object(key)
-                if data and 'insights' in data:
-                    all_insights.extend(data['insights'])
-        
-        all_insights.sort(key=lambda x: x.get('generated_at', ''), reverse=True)
-        return all_insights[:limit]
+        keys = [k for k in self._list_objects("ai_insights/") if k.endswith('.json')]
+        # Stream insights month by month into a bounded heap instead of collecting and sorting them all
+        all_insights = (insight for data in self._pool.map(self._get_object, keys)
+                        if data for insight in data.get('insights', []))
+        return heapq.nlargest(limit, all_insights, key=lambda x: x.get('generated_at', ''))
+
+    # Persistent AI prediction cache, so re-runs and restarts don't repeat identical Gemini calls.
+    # One object per team, overwritten when its history changes and deleted with the team,
+    # so the bucket never holds more than one entry per team
+    def get_ai_prediction(self, team_id: str, history_hash: str) -> Optional[Dict]:
+        entry = self._get_object(f"ai_cache/predictions/{team_id}.json")
+        if (not entry or entry.get('history_hash') != history_hash
+                or entry.get('expires_at', '') <= datetime.now(timezone.utc).isoformat()):
+            return None
+        return entry.get('value')
+    
+    def save_ai_prediction(self, team_id: str, history_hash: str, value: Dict,
+                           ttl: timedelta = timedelta(days=7)) -> bool:
+        return self._put_object(f"ai_cache/predictions/{team_id}.json", {
+            'history_hash': history_hash,
+            'value': value,
+            'expires_at': (datetime.now(timezone.utc) + ttl).isoformat()
+        })
 
 # Initialize storage
 storage = S3Storage()
@@ -797,15 +1274,27 @@ class CostAnomaly(BaseModel):
     ai_explanation: Optional[str] = None
     detected_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+ScheduleDay = Literal['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
 class NotificationConfigUpdate(BaseModel):
     anomaly_threshold: Optional[float] = None
-    schedule_day: Optional[str] = None
-    schedule_hour: Optional[int] = None
+    schedule_day: Optional[ScheduleDay] = None
+    schedule_hour: Optional[int] = Field(default=None, ge=0, le=23)
     global_admin_emails: Optional[List[EmailStr]] = None
     ai_enabled: Optional[bool] = None
+    
+    @field_validator('schedule_day', mode='before')
+    @classmethod
+    def _lowercase_day(cls, v):
+        return v.lower() if isinstance(v, str) else v
 
 # ==================== DATADOG SERVICE ====================
 
+# Max concurrent Datadog requests when fanning out over accounts
+DATADOG_CONCURRENCY = int(os.environ.get('DATADOG_CONCURRENCY', 20))
+# Seconds a Datadog cost query result is reused for identical (account, start, end) queries
+DATADOG_CACHE_TTL = float(os.environ.get('DATADOG_CACHE_TTL', 300))
+
 class DatadogService:
     """
     Service to fetch AWS cost data from Datadog.
@@ -820,6 +1309,31 @@ class DatadogService:
         self.app_key = os.environ.get('DATADOG_APP_KEY', '')
         self.site = os.environ.get('DATADOG_SITE', 'datadoghq.com')
         self.base_url = f"https://api.{self.site}"
+        self._client: Optional[httpx.AsyncClient] = None
+        # (account_id, start, end) -> (expires_at, fetch task)
+        self._metrics_cache: Dict[tuple, tuple] = {}
+        # {(start_month, end_month): (expires, task)} for the org-wide cost_by_org response
+        self._cost_by_org_cache: Dict[tuple, tuple] = {}
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client so connections (and TLS sessions) are reused across calls"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                headers={
+                    "DD-API-KEY": self.api_key,
+                    "DD-APPLICATION-KEY": self.app_key,
+                    "Content-Type": "application/json"
+                }
+            )
+        return self._client
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _to_epoch(self, dt: datetime) -> int:
         """Convert datetime to epoch seconds"""
@@ -850,6 +1364,31 @@ class DatadogService:
             logger.warning("Datadog credentials not configured, returning mock data")
             return self._generate_mock_data(account_id, start_date, end_date)
         
+        # Identical queries within the TTL (and concurrent duplicates) share one fetch
+        key = (account_id, start_date, end_date)
+        now = time.monotonic()
+        cached = self._metrics_cache.get(key)
+        if cached is None or cached[0] <= now:
+            if len(self._metrics_cache) >= 1024:
+                self._metrics_cache = {k: v for k, v in self._metrics_cache.items() if v[0] > now}
+            task = asyncio.create_task(self._fetch_cost_metrics(account_id, start_date, end_date))
+            task.add_done_callback(lambda t: self._drop_failed_fetch(key, t))
+            cached = (now + DATADOG_CACHE_TTL, task)
+            self._metrics_cache[key] = cached
+        # Shield so a cancelled caller doesn't cancel the fetch other callers are waiting on
+        return await asyncio.shield(cached[1])
+    
+    def clear_cache(self):
+        self._metrics_cache.clear()
+        self._cost_by_org_cache.clear()
+    
+    def _drop_failed_fetch(self, key: tuple, task: asyncio.Task):
+        """Don't keep mock fallbacks (API errors) in the cache"""
+        entry = self._metrics_cache.get(key)
+        if entry and entry[1] is task and (task.cancelled() or task.exception() or task.result().get('is_mock')):
+            del self._metrics_cache[key]
+    
+    async def _fetch_cost_metrics(self, account_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         try:
             # Convert dates to epoch seconds
             start_dt = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
@@ -857,47 +1396,81 @@ class DatadogService:
             start_epoch = self._to_epoch(start_dt)
             end_epoch = self._to_epoch(end_dt)
             
-            headers = {
-                "DD-API-KEY": self.api_key,
-                "DD-APPLICATION-KEY": self.app_key,
-                "Content-Type": "application/json"
-            }
+            # Try Cloud Cost Management API first (v2)
+            cost_data = await self._fetch_cloud_cost(account_id, start_epoch, end_epoch)
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Try Cloud Cost Management API first (v2)
-                cost_data = await self._fetch_cloud_cost(client, headers, account_id, start_epoch, end_epoch)
-                
-                if cost_data:
-                    return cost_data
-                
-                # Fallback to metrics API with epoch timestamps
-                return await self._fetch_metrics_cost(client, headers, account_id, start_epoch, end_epoch)
+            if cost_data:
+                return cost_data
+            
+            # Fallback to metrics API with epoch timestamps
+            return await self._fetch_metrics_cost(account_id, start_epoch, end_epoch)
                     
         except Exception as e:
             logger.error(f"Error fetching from Datadog: {e}")
             return self._generate_mock_data(account_id, start_date, end_date)
     
-    async def _fetch_cloud_cost(self, client: httpx.AsyncClient, headers: Dict, 
-                                 account_id: str, start_epoch: int, end_epoch: int) -> Optional[Dict]:
+    async def fetch_all(self, account_ids: List[str], start_date: str, end_date: str) -> List:
+        """
+        Fetch cost metrics for many accounts concurrently, bounded by
+        DATADOG_CONCURRENCY to stay inside Datadog rate limits.
+        Returns (account_id, data) pairs in input order; a failed fetch
+        yields the exception instead of a pair.
+        """
+        sem = asyncio.Semaphore(DATADOG_CONCURRENCY)
+        
+        async def _one(account_id: str):
+            async with sem:
+                return account_id, await self.get_cost_metrics(account_id, start_date, end_date)
+        
+        return await asyncio.gather(*[_one(a) for a in account_ids], return_exceptions=True)
+    
+    async def _fetch_cloud_cost(self, account_id: str, start_epoch: int, end_epoch: int) -> Optional[Dict]:
         """
         Fetch from Cloud Cost Management API (v2).
         This is the correct API for AWS cost data.
         """
+        data = await self._get_cost_by_org(
+            datetime.fromtimestamp(start_epoch, tz=timezone.utc).strftime("%Y-%m"),
+            datetime.fromtimestamp(end_epoch, tz=timezone.utc).strftime("%Y-%m")
+        )
+        if data is None:
+            return None
+        return self._parse_cloud_cost_response(data, account_id)
+    
+    async def _get_cost_by_org(self, start_month: str, end_month: str) -> Optional[Dict]:
+        """
+        cost_by_org returns every account's charges in one response, so all accounts
+        share a single request per month range instead of one request per team.
+        """
+        key = (start_month, end_month)
+        now = time.monotonic()
+        cached = self._cost_by_org_cache.get(key)
+        if cached is None or cached[0] <= now:
+            task = asyncio.create_task(self._request_cost_by_org(start_month, end_month))
+            task.add_done_callback(lambda t: self._drop_failed_cost_by_org(key, t))
+            cached = (now + DATADOG_CACHE_TTL, task)
+            self._cost_by_org_cache[key] = cached
+        return await asyncio.shield(cached[1])
+    
+    def _drop_failed_cost_by_org(self, key: tuple, task: asyncio.Task):
+        """Retry unavailable/failed responses on the next call instead of caching them"""
+        entry = self._cost_by_org_cache.get(key)
+        if entry and entry[1] is task and (task.cancelled() or task.exception() or task.result() is None):
+            del self._cost_by_org_cache[key]
+    
+    async def _request_cost_by_org(self, start_month: str, end_month: str) -> Optional[Dict]:
         try:
-            # Cloud Cost Management endpoint
-            url = f"{self.base_url}/api/v2/cost_by_org"
-            
             params = {
-                "start_month": datetime.fromtimestamp(start_epoch, tz=timezone.utc).strftime("%Y-%m"),
-                "end_month": datetime.fromtimestamp(end_epoch, tz=timezone.utc).strftime("%Y-%m"),
+                "start_month": start_month,
+                "end_month": end_month,
                 "view": "sub_org"  # Get breakdown by org/account
             }
             
-            response = await client.get(url, headers=headers, params=params)
+            # Cloud Cost Management endpoint
+            response = await self._get_client().get("/api/v2/cost_by_org", params=params)
             
             if response.status_code == 200:
-                data = response.json()
-                return self._parse_cloud_cost_response(data, account_id)
+                return response.json()
             elif response.status_code == 403:
                 logger.warning("Cloud Cost Management API not available (check Datadog plan)")
                 return None
@@ -909,8 +1482,7 @@ class DatadogService:
             logger.warning(f"Cloud Cost API error: {e}")
             return None
     
-    async def _fetch_metrics_cost(self, client: httpx.AsyncClient, headers: Dict,
-                                   account_id: str, start_epoch: int, end_epoch: int) -> Dict:
+    async def _fetch_metrics_cost(self, account_id: str, start_epoch: int, end_epoch: int) -> Dict:
         """
         Fallback to metrics API with correct epoch timestamps.
         Note: This may not give accurate cost data - Cloud Cost API is preferred.
@@ -925,11 +1497,7 @@ class DatadogService:
                 "query": query
             }
             
-            response = await client.get(
-                f"{self.base_url}/api/v1/query",
-                headers=headers,
-                params=params
-            )
+            response = await self._get_client().get("/api/v1/query", params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1011,87 +1579,368 @@ class DatadogService:
     
     def _generate_mock_data(self, account_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
         """Generate mock data for testing when Datadog is not configured"""
-        import random
+        base_cost, service_breakdown = self._mock_costs(account_id)
         
-        # Use account_id as seed for consistent mock data
+        return {
+            "account_id": account_id,
+            "total_cost": base_cost,
+            "service_breakdown": dict(service_breakdown),
+            "source": "mock_data",
+            "is_mock": True,
+            "note": "Configure DATADOG_API_KEY and DATADOG_APP_KEY for real data"
+        }
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _mock_costs(account_id: str) -> tuple:
+        """Mock costs depend only on the account, so they're drawn once per account"""
+        # Use account_id as seed for consistent mock data; a private generator
+        # leaves the global random state alone
         seed = int(hashlib.md5(account_id.encode()).hexdigest()[:8], 16)
-        random.seed(seed)
+        rng = random.Random(seed)
         
-        base_cost = random.uniform(5000, 50000)
+        base_cost = rng.uniform(5000, 50000)
         services = ["EC2", "RDS", "S3", "Lambda", "CloudFront", "ECS", "EKS", "DynamoDB"]
         
         service_breakdown = {}
         remaining = base_cost
-        for i, service in enumerate(services[:-1]):
+        for service in services[:-1]:
             if remaining <= 0:
                 break
-            cost = random.uniform(0, remaining * 0.4)
+            cost = rng.uniform(0, remaining * 0.4)
             service_breakdown[service] = round(cost, 2)
             remaining -= cost
         service_breakdown[services[-1]] = round(max(remaining, 0), 2)
         
-        return {
-            "account_id": account_id,
-            "total_cost": round(base_cost, 2),
-            "service_breakdown": service_breakdown,
-            "source": "mock_data",
-            "is_mock": True,
-            "note": "Configure DATADOG_API_KEY and DATADOG_APP_KEY for real data"
-        }
+        return round(base_cost, 2), service_breakdown
 
 datadog_service = DatadogService()
 
 # ==================== EMAIL SERVICE ====================
 
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+def _change_indicator(change: float, anomaly_label: bool = False) -> Markup:
+    """Colored percentage span; >20% is flagged red"""
+    if change > 20:
+        if anomaly_label:
+            return Markup(f'<span style="color: #dc2626; font-weight: bold;">+{change:.1f}% ⚠️ ANOMALY</span>')
+        return Markup(f'<span style="color: #dc2626;">+{change:.1f}% ⚠️</span>')
+    elif change > 0:
+        return Markup(f'<span style="color: #f59e0b;">+{change:.1f}%</span>')
+    return Markup(f'<span style="color: #10b981;">{change:.1f}%</span>')
+
+# Shell shared by both reports: document head, common styles, header bar and footer
+EMAIL_BASE_HTML = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #1f2937; }
+            .container { max-width: {% block max_width %}700px{% endblock %}; margin: 0 auto; padding: 20px; }
+            .header { background: linear-gradient(135deg, #1e3a5f 0%, #2d5a87 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }
+            .content { background: #ffffff; padding: 20px; border: 1px solid #e5e7eb; }
+            .ai-section { background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%); border-radius: 8px; padding: 15px; margin: 15px 0; border-left: 4px solid #f59e0b; }
+            th { background: #f3f4f6; padding: 10px; text-align: left; }
+            {% block styles %}{% endblock %}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1 style="margin: 0; font-size: 24px;">{% block title %}{% endblock %}</h1>
+                <p style="margin: 5px 0 0 0; opacity: 0.9;">{% block subtitle %}{% endblock %}</p>
+            </div>
+            <div class="content">
+                {% block content %}{% endblock %}
+                
+                <p style="margin-top: 20px; font-size: 12px; color: #9ca3af;">
+                    Generated by AWS Cost AI Agent v3.1.0 • Powered by {% block model %}Gemini{% endblock %}
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+TEAM_EMAIL_HTML = """
+    {% extends 'base.html' %}
+    {% block styles %}
+            .metric-card { background: #f9fafb; border-radius: 8px; padding: 15px; margin: 10px 0; }
+            .metric-value { font-size: 28px; font-weight: bold; color: #1e3a5f; }
+            table { width: 100%; border-collapse: collapse; margin-top: 15px; }
+    {% endblock %}
+    {% block title %}🤖 AI-Powered Cost Report{% endblock %}
+    {% block subtitle %}{{ team.team_name }} - {{ report_month }}{% endblock %}
+    {% block content %}
+                <div class="metric-card">
+                    <div style="font-size: 14px; color: #6b7280;">Current Month Cost</div>
+                    <div class="metric-value">${{ money(current_cost) }}</div>
+                </div>
+                <div class="metric-card">
+                    <div style="font-size: 14px; color: #6b7280;">Previous Month Cost</div>
+                    <div class="metric-value">${{ money(previous_cost) }}</div>
+                </div>
+                <div class="metric-card">
+                    <div style="font-size: 14px; color: #6b7280;">Month-over-Month Change</div>
+                    <div class="metric-value">{{ indicator(change, anomaly_label=True) }}</div>
+                </div>
+                
+                <div class="ai-section">
+                    <h3 style="margin: 0 0 10px 0; color: #92400e;">🧠 AI Analysis (Gemini)</h3>
+                    <div style="white-space: pre-wrap;">{{ ai_text }}</div>
+                </div>
+                {% if datadog_links %}
+                <div style="margin-top: 15px; padding: 10px; background: #f0f9ff; border-radius: 8px;">
+                    <strong>📊 Datadog Links:</strong><br>
+                    <a href="{{ datadog_links.cost_dashboard }}" style="color: #2563eb;">Cost Dashboard</a> | 
+                    <a href="{{ datadog_links.cost_explorer }}" style="color: #2563eb;">Cost Explorer</a> | 
+                    <a href="{{ datadog_links.service_breakdown }}" style="color: #2563eb;">Service Breakdown</a>
+                </div>
+                {% endif %}
+                
+                <h3 style="margin-top: 25px; color: #1e3a5f;">Cost Breakdown by Service</h3>
+                <table>
+                    <tr>
+                        <th>Service</th>
+                        <th style="text-align: right;">Cost</th>
+                        <th style="text-align: right;">Change</th>
+                    </tr>
+                    {% for service, cost, svc_change in services %}
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{{ service }}</td>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${{ money(cost) }}</td>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{{ indicator(svc_change) }}</td>
+                    </tr>
+                    {% endfor %}
+                </table>
+    {% endblock %}
+    """
+
+ADMIN_EMAIL_HTML = """
+    {% extends 'base.html' %}
+    {% block max_width %}900px{% endblock %}
+    {% block styles %}
+            .summary-grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; margin: 20px 0; }
+            .metric-card { background: #f9fafb; border-radius: 8px; padding: 15px; text-align: center; }
+            .metric-value { font-size: 24px; font-weight: bold; color: #1e3a5f; }
+            .anomaly-section { background: #fef2f2; border: 1px solid #fecaca; border-radius: 8px; padding: 15px; margin: 20px 0; }
+            table { width: 100%; border-collapse: collapse; margin-top: 15px; font-size: 14px; }
+    {% endblock %}
+    {% block title %}🤖 AI-Powered Organization Cost Summary{% endblock %}
+    {% block subtitle %}All {{ teams_count }} Accounts - {{ report_month }}{% endblock %}
+    {% block model %}Gemini 3 Flash{% endblock %}
+    {% block content %}
+                <div class="ai-section">
+                    <h3 style="margin: 0 0 10px 0; color: #92400e;">🧠 Executive Summary (AI-Generated)</h3>
+                    <div style="white-space: pre-wrap;">{{ ai_summary }}</div>
+                </div>
+                
+                <div class="summary-grid">
+                    <div class="metric-card">
+                        <div style="font-size: 12px; color: #6b7280;">Total Current Month</div>
+                        <div class="metric-value">${{ money(total_current) }}</div>
+                    </div>
+                    <div class="metric-card">
+                        <div style="font-size: 12px; color: #6b7280;">Total Previous Month</div>
+                        <div class="metric-value">${{ money(total_previous) }}</div>
+                    </div>
+                    <div class="metric-card">
+                        <div style="font-size: 12px; color: #6b7280;">Total Change</div>
+                        <div class="metric-value" style="color: {{ '#dc2626' if total_change > 20 else '#10b981' }};">{{ '+' if total_change > 0 else '' }}{{ '%.1f' % total_change }}%</div>
+                    </div>
+                </div>
+                
+                <div class="anomaly-section">
+                    <h3 style="margin: 0 0 10px 0; color: #dc2626;">⚠️ Top Cost Anomalies ({{ anomalies_count }} detected)</h3>
+                    <table>
+                        <tr><th>#</th><th>Team</th><th style="text-align: right;">Current Cost</th><th style="text-align: right;">Change</th></tr>
+                        {% for anomaly in top_anomalies %}
+                        <tr>
+                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{{ loop.index }}</td>
+                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{{ anomaly.get('team_name', 'N/A') }}</td>
+                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${{ money(anomaly.get('current_cost', 0)) }}</td>
+                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right; color: #dc2626;">+{{ '%.1f' % anomaly.get('percentage_change', 0) }}%</td>
+                        </tr>
+                        {% endfor %}
+                    </table>
+                </div>
+                
+                <div class="ai-section">
+                    <h3 style="margin: 0 0 10px 0; color: #92400e;">💡 AI Optimization Recommendations</h3>
+                    <div style="white-space: pre-wrap;">{{ ai_rec_text }}</div>
+                </div>
+                
+                <h3 style="margin-top: 25px; color: #1e3a5f;">All Teams Cost Summary</h3>
+                <table>
+                    <tr><th>Team</th><th>Account ID</th><th style="text-align: right;">Current</th><th style="text-align: right;">Change</th></tr>
+                    {% for team_data in sorted_teams %}
+                    <tr>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{{ team_data.get('team_name', 'N/A') }}</td>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{{ team_data.get('aws_account_id', 'N/A') }}</td>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${{ money(team_data.get('current_month_cost', 0)) }}</td>
+                        <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{{ indicator(team_data.get('percentage_change', 0)) }}</td>
+                    </tr>
+                    {% endfor %}
+                </table>
+    {% endblock %}
+    """
+
+# Shared environment: templates are compiled once at import, and every interpolated
+# value in a .html template (team names, AI output) is HTML-escaped
+_EMAIL_ENV = Environment(
+    loader=DictLoader({'base.html': EMAIL_BASE_HTML, 'team.html': TEAM_EMAIL_HTML, 'admin.html': ADMIN_EMAIL_HTML}),
+    autoescape=select_autoescape(['html'])
+)
+_EMAIL_ENV.globals.update(money=_money, indicator=_change_indicator)
+
+TEAM_EMAIL_TEMPLATE = _EMAIL_ENV.get_template('team.html')
+ADMIN_EMAIL_TEMPLATE = _EMAIL_ENV.get_template('admin.html')
+
 class EmailService:
     """
     Service to send email notifications with AI insights.
     All SMTP credentials are read from environment variables only.
     """
     
+    def __init__(self):
+        self._smtp_config: Optional[Dict] = None
+    
     def _get_smtp_config(self) -> Dict:
         """Get SMTP config from environment only - never from stored config"""
-        return {
-            'smtp_host': os.environ.get('SMTP_HOST', ''),
-            'smtp_port': int(os.environ.get('SMTP_PORT', 587)),
-            'smtp_user': os.environ.get('SMTP_USER', ''),
-            'smtp_password': os.environ.get('SMTP_PASSWORD', ''),
-            'sender_email': os.environ.get('SENDER_EMAIL', os.environ.get('SMTP_USER', ''))
-        }
+        # The environment doesn't change while the process runs, so read it once
+        if self._smtp_config is None:
+            self._smtp_config = {
+                'smtp_host': os.environ.get('SMTP_HOST', ''),
+                'smtp_port': int(os.environ.get('SMTP_PORT', 587)),
+                'smtp_user': os.environ.get('SMTP_USER', ''),
+                'smtp_password': os.environ.get('SMTP_PASSWORD', ''),
+                'sender_email': os.environ.get('SENDER_EMAIL', os.environ.get('SMTP_USER', ''))
+            }
+        return self._smtp_config
+    
+    def build_team_report(self, team: Dict, cost_data: Dict, ai_analysis: Dict) -> tuple:
+        """Build the (to_emails, subject, html_content) job for a team report"""
+        subject = f"🤖 AWS Cost Report - {team['team_name']} (Week of {datetime.now().strftime('%b %d')})"
+        html_content = self._generate_team_email_html(team, cost_data, ai_analysis)
+        return [team['team_email']], subject, html_content
+    
+    def build_admin_report(self, all_teams_data: List[Dict], all_anomalies: List[Dict],
+                           ai_summary: str, ai_recommendations: Dict, config: Dict,
+                           org: Optional[Dict] = None) -> Optional[tuple]:
+        """Build the admin report job, or None when no admin emails are configured"""
+        admin_emails = config.get('global_admin_emails', [])
+        if not admin_emails:
+            return None
+        subject = f"🤖 AWS Org Cost Summary - All {len(all_teams_data)} Accounts (Week of {datetime.now().strftime('%b %d')})"
+        html_content = self._generate_admin_email_html(all_teams_data, all_anomalies, ai_summary,
+                                                       ai_recommendations, org)
+        return admin_emails, subject, html_content
     
     async def send_team_report(self, team: Dict, cost_data: Dict, ai_analysis: Dict, config: Dict):
         try:
-            subject = f"🤖 AWS Cost Report - {team['team_name']} (Week of {datetime.now().strftime('%b %d')})"
-            html_content = self._generate_team_email_html(team, cost_data, ai_analysis)
-            
-            await self._send_email(
-                to_emails=[team['team_email']],
-                subject=subject,
-                html_content=html_content
-            )
+            to_emails, subject, html_content = self.build_team_report(team, cost_data, ai_analysis)
+            await self._send_email(to_emails=to_emails, subject=subject, html_content=html_content)
             logger.info(f"Team report sent to {team['team_email']}")
         except Exception as e:
             logger.error(f"Failed to send team report: {e}")
     
-    async def send_admin_report(self, all_teams_data: List[Dict], all_anomalies: List[Dict], 
-                                 ai_summary: str, ai_recommendations: Dict, config: Dict):
+    async def send_batch(self, jobs: List[tuple]) -> int:
+        """
+        Send (to_emails, subject, html_content) jobs over a single SMTP session.
+        A failed message is logged and skipped; the batch is aborted once more
+        than a third of it has failed. Returns the number of messages sent.
+        """
+        if not jobs:
+            return 0
+        # smtplib blocks; run the whole session off the event loop
+        return await asyncio.to_thread(self._send_batch_sync, jobs)
+    
+    def _send_batch_sync(self, jobs: List[tuple]) -> int:
+        smtp_config = self._get_smtp_config()
+        if not self._smtp_configured(smtp_config):
+            logger.warning("SMTP not configured in environment, logging emails instead")
+            for to_emails, subject, _ in jobs:
+                logger.info(f"Would send to: {to_emails} - Subject: {subject}")
+            return 0
+        
+        sender_email = smtp_config['sender_email']
+        sent = failed = 0
+        server = None
         try:
-            subject = f"🤖 AWS Org Cost Summary - All {len(all_teams_data)} Accounts (Week of {datetime.now().strftime('%b %d')})"
-            html_content = self._generate_admin_email_html(all_teams_data, all_anomalies, ai_summary, ai_recommendations)
-            
-            admin_emails = config.get('global_admin_emails', [])
-            if admin_emails:
-                await self._send_email(
-                    to_emails=admin_emails,
-                    subject=subject,
-                    html_content=html_content
-                )
-                logger.info(f"Admin report sent to {len(admin_emails)} admins")
-        except Exception as e:
-            logger.error(f"Failed to send admin report: {e}")
+            server = self._open_smtp(smtp_config)
+            for to_emails, subject, html_content in jobs:
+                msg = self._build_message(sender_email, to_emails, subject, html_content)
+                try:
+                    try:
+                        server.send_message(msg, sender_email, to_emails)
+                    except smtplib.SMTPServerDisconnected:
+                        # Server dropped the session (idle timeout, per-connection limit): reconnect once and retry
+                        logger.warning("SMTP session dropped mid-batch, reconnecting")
+                        server.close()
+                        server = None
+                        try:
+                            server = self._open_smtp(smtp_config)
+                        except smtplib.SMTPException as e:
+                            # Not a per-message failure: with no session left, hand it to the
+                            # outer handler so the batch ends instead of using a dead server
+                            raise ConnectionError(f"SMTP reconnect failed: {e}") from e
+                        server.send_message(msg, sender_email, to_emails)
+                    sent += 1
+                except smtplib.SMTPException as e:
+                    failed += 1
+                    logger.error(f"Failed to send '{subject}' to {to_emails}: {e}")
+                    if failed * 3 > len(jobs):
+                        logger.error(f"Aborting email batch after {failed} of {len(jobs)} failures")
+                        break
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Email batch failed: {e}")
+        finally:
+            if server is not None:
+                self._close_smtp(server)
+        
+        logger.info(f"Email batch sent {sent}/{len(jobs)} messages")
+        return sent
+    
+    @staticmethod
+    def _open_smtp(smtp_config: Dict) -> smtplib.SMTP:
+        """Connect, STARTTLS and log in; the caller owns closing the session"""
+        server = smtplib.SMTP(smtp_config['smtp_host'], smtp_config['smtp_port'])
+        try:
+            server.starttls()
+            server.login(smtp_config['smtp_user'], smtp_config['smtp_password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    @staticmethod
+    def _close_smtp(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
+    @staticmethod
+    def _smtp_configured(smtp_config: Dict) -> bool:
+        return all([smtp_config['smtp_host'], smtp_config['smtp_user'],
+                    smtp_config['smtp_password'], smtp_config['sender_email']])
+    
+    @staticmethod
+    def _build_message(sender_email: str, to_emails: List[str], subject: str, html_content: str) -> EmailMessage:
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = sender_email
+        msg['To'] = ', '.join(to_emails)
+        msg.set_content(html_content, subtype='html')
+        return msg
     
     async def _send_email(self, to_emails: List[str], subject: str, html_content: str):
         """Send email using SMTP credentials from environment"""
+        await asyncio.to_thread(self._send_sync, to_emails, subject, html_content)
+    
+    def _send_sync(self, to_emails: List[str], subject: str, html_content: str):
         smtp_config = self._get_smtp_config()
         
         smtp_host = smtp_config['smtp_host']
@@ -1100,266 +1949,130 @@ class EmailService:
         smtp_password = smtp_config['smtp_password']
         sender_email = smtp_config['sender_email']
         
-        if not all([smtp_host, smtp_user, smtp_password, sender_email]):
+        if not self._smtp_configured(smtp_config):
             logger.warning("SMTP not configured in environment, logging email instead")
             logger.info(f"Would send to: {to_emails}")
             logger.info(f"Subject: {subject}")
             return
         
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = sender_email
-        msg['To'] = ', '.join(to_emails)
-        
-        html_part = MIMEText(html_content, 'html')
-        msg.attach(html_part)
+        msg = self._build_message(sender_email, to_emails, subject, html_content)
         
         with smtplib.SMTP(smtp_host, smtp_port) as server:
             server.starttls()
             server.login(smtp_user, smtp_password)
-            server.sendmail(sender_email, to_emails, msg.as_string())
+            server.send_message(msg, sender_email, to_emails)
     
     def _generate_team_email_html(self, team: Dict, cost_data: Dict, ai_analysis: Dict) -> str:
         current_cost = cost_data.get('current_month_cost', 0)
         previous_cost = cost_data.get('previous_month_cost', 0)
         change = ((current_cost - previous_cost) / previous_cost * 100) if previous_cost > 0 else 0
         
-        if change > 20:
-            change_indicator = f'<span style="color: #dc2626; font-weight: bold;">+{change:.1f}% ⚠️ ANOMALY</span>'
-        elif change > 0:
-            change_indicator = f'<span style="color: #f59e0b;">+{change:.1f}%</span>'
-        else:
-            change_indicator = f'<span style="color: #10b981;">{change:.1f}%</span>'
-        
-        # Service breakdown
-        services_html = ""
+        # Service breakdown rows as (service, cost, change)
+        previous_breakdown = cost_data.get('previous_service_breakdown', {})
+        services = []
         for service, cost in cost_data.get('service_breakdown', {}).items():
-            prev_cost = cost_data.get('previous_service_breakdown', {}).get(service, 0)
-            svc_change = ((cost - prev_cost) / prev_cost * 100) if prev_cost > 0 else 0
-            
-            if svc_change > 20:
-                svc_indicator = f'<span style="color: #dc2626;">+{svc_change:.1f}% ⚠️</span>'
-            elif svc_change > 0:
-                svc_indicator = f'<span style="color: #f59e0b;">+{svc_change:.1f}%</span>'
-            else:
-                svc_indicator = f'<span style="color: #10b981;">{svc_change:.1f}%</span>'
-            
-            services_html += f"""
-            <tr>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{service}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${cost:,.2f}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{svc_indicator}</td>
-            </tr>"""
-        
-        # AI Analysis section
-        ai_text = ai_analysis.get('ai_analysis', 'AI analysis not available')
-        datadog_links = ai_analysis.get('datadog_links', {})
-        
-        links_html = ""
-        if datadog_links:
-            links_html = """
-            <div style="margin-top: 15px; padding: 10px; background: #f0f9ff; border-radius: 8px;">
-                <strong>📊 Datadog Links:</strong><br>
-                <a href="{cost_dashboard}" style="color: #2563eb;">Cost Dashboard</a> | 
-                <a href="{cost_explorer}" style="color: #2563eb;">Cost Explorer</a> | 
-                <a href="{service_breakdown}" style="color: #2563eb;">Service Breakdown</a>
-            </div>
-            """.format(**datadog_links)
-        
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #1f2937; }}
-                .container {{ max-width: 700px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #1e3a5f 0%, #2d5a87 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
-                .content {{ background: #ffffff; padding: 20px; border: 1px solid #e5e7eb; }}
-                .metric-card {{ background: #f9fafb; border-radius: 8px; padding: 15px; margin: 10px 0; }}
-                .metric-value {{ font-size: 28px; font-weight: bold; color: #1e3a5f; }}
-                .ai-section {{ background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%); border-radius: 8px; padding: 15px; margin: 15px 0; border-left: 4px solid #f59e0b; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 15px; }}
-                th {{ background: #f3f4f6; padding: 10px; text-align: left; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1 style="margin: 0; font-size: 24px;">🤖 AI-Powered Cost Report</h1>
-                    <p style="margin: 5px 0 0 0; opacity: 0.9;">{team['team_name']} - {datetime.now().strftime('%B %Y')}</p>
-                </div>
-                <div class="content">
-                    <div class="metric-card">
-                        <div style="font-size: 14px; color: #6b7280;">Current Month Cost</div>
-                        <div class="metric-value">${current_cost:,.2f}</div>
-                    </div>
-                    <div class="metric-card">
-                        <div style="font-size: 14px; color: #6b7280;">Previous Month Cost</div>
-                        <div class="metric-value">${previous_cost:,.2f}</div>
-                    </div>
-                    <div class="metric-card">
-                        <div style="font-size: 14px; color: #6b7280;">Month-over-Month Change</div>
-                        <div class="metric-value">{change_indicator}</div>
-                    </div>
-                    
-                    <div class="ai-section">
-                        <h3 style="margin: 0 0 10px 0; color: #92400e;">🧠 AI Analysis (Gemini)</h3>
-                        <div style="white-space: pre-wrap;">{ai_text}</div>
-                    </div>
-                    
-                    {links_html}
-                    
-                    <h3 style="margin-top: 25px; color: #1e3a5f;">Cost Breakdown by Service</h3>
-                    <table>
-                        <tr>
-                            <th>Service</th>
-                            <th style="text-align: right;">Cost</th>
-                            <th style="text-align: right;">Change</th>
-                        </tr>
-                        {services_html}
-                    </table>
-                    
-                    <p style="margin-top: 20px; font-size: 12px; color: #9ca3af;">
-                        Generated by AWS Cost AI Agent v3.1.0 • Powered by Gemini
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+            prev_cost = previous_breakdown.get(service, 0)
+            services.append((service, cost, ((cost - prev_cost) / prev_cost * 100) if prev_cost > 0 else 0))
+        
+        return TEAM_EMAIL_TEMPLATE.render(
+            team=team,
+            report_month=datetime.now().strftime('%B %Y'),
+            current_cost=current_cost,
+            previous_cost=previous_cost,
+            change=change,
+            ai_text=ai_analysis.get('ai_analysis', 'AI analysis not available'),
+            datadog_links=ai_analysis.get('datadog_links', {}),
+            services=services
+        )
     
     def _generate_admin_email_html(self, all_teams_data: List[Dict], all_anomalies: List[Dict], 
-                                    ai_summary: str, ai_recommendations: Dict) -> str:
-        total_current = sum(t.get('current_month_cost', 0) for t in all_teams_data)
-        total_previous = sum(t.get('previous_month_cost', 0) for t in all_teams_data)
-        total_change = ((total_current - total_previous) / total_previous * 100) if total_previous > 0 else 0
-        
-        # Anomalies table
-        anomalies_html = ""
-        sorted_anomalies = sorted(all_anomalies, key=lambda x: x.get('percentage_change', 0), reverse=True)[:10]
-        for i, anomaly in enumerate(sorted_anomalies, 1):
-            anomalies_html += f"""
-            <tr>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{i}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{anomaly.get('team_name', 'N/A')}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${anomaly.get('current_cost', 0):,.2f}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right; color: #dc2626;">+{anomaly.get('percentage_change', 0):.1f}%</td>
-            </tr>"""
-        
-        # All teams table
-        teams_html = ""
-        sorted_teams = sorted(all_teams_data, key=lambda x: x.get('current_month_cost', 0), reverse=True)
-        for team_data in sorted_teams:
-            change = team_data.get('percentage_change', 0)
-            if change > 20:
-                change_indicator = f'<span style="color: #dc2626;">+{change:.1f}% ⚠️</span>'
-            elif change > 0:
-                change_indicator = f'<span style="color: #f59e0b;">+{change:.1f}%</span>'
-            else:
-                change_indicator = f'<span style="color: #10b981;">{change:.1f}%</span>'
-            
-            teams_html += f"""
-            <tr>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{team_data.get('team_name', 'N/A')}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{team_data.get('aws_account_id', 'N/A')}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">${team_data.get('current_month_cost', 0):,.2f}</td>
-                <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; text-align: right;">{change_indicator}</td>
-            </tr>"""
-        
-        # AI Recommendations
-        ai_rec_text = ai_recommendations.get('org_recommendations', 'Configure GEMINI_API_KEY for AI recommendations')
-        
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: 'Segoe UI', Arial, sans-serif; line-height: 1.6; color: #1f2937; }}
-                .container {{ max-width: 900px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #1e3a5f 0%, #2d5a87 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
-                .content {{ background: #ffffff; padding: 20px; border: 1px solid #e5e7eb; }}
-                .summary-grid {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 15px; margin: 20px 0; }}
-                .metric-card {{ background: #f9fafb; border-radius: 8px; padding: 15px; text-align: center; }}
-                .metric-value {{ font-size: 24px; font-weight: bold; color: #1e3a5f; }}
-                .ai-section {{ background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%); border-radius: 8px; padding: 15px; margin: 15px 0; border-left: 4px solid #f59e0b; }}
-                .anomaly-section {{ background: #fef2f2; border: 1px solid #fecaca; border-radius: 8px; padding: 15px; margin: 20px 0; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 15px; font-size: 14px; }}
-                th {{ background: #f3f4f6; padding: 10px; text-align: left; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1 style="margin: 0; font-size: 24px;">🤖 AI-Powered Organization Cost Summary</h1>
-                    <p style="margin: 5px 0 0 0; opacity: 0.9;">All {len(all_teams_data)} Accounts - {datetime.now().strftime('%B %Y')}</p>
-                </div>
-                <div class="content">
-                    <div class="ai-section">
-                        <h3 style="margin: 0 0 10px 0; color: #92400e;">🧠 Executive Summary (AI-Generated)</h3>
-                        <div style="white-space: pre-wrap;">{ai_summary}</div>
-                    </div>
-                    
-                    <div class="summary-grid">
-                        <div class="metric-card">
-                            <div style="font-size: 12px; color: #6b7280;">Total Current Month</div>
-                            <div class="metric-value">${total_current:,.2f}</div>
-                        </div>
-                        <div class="metric-card">
-                            <div style="font-size: 12px; color: #6b7280;">Total Previous Month</div>
-                            <div class="metric-value">${total_previous:,.2f}</div>
-                        </div>
-                        <div class="metric-card">
-                            <div style="font-size: 12px; color: #6b7280;">Total Change</div>
-                            <div class="metric-value" style="color: {'#dc2626' if total_change > 20 else '#10b981'};">{'+' if total_change > 0 else ''}{total_change:.1f}%</div>
-                        </div>
-                    </div>
-                    
-                    <div class="anomaly-section">
-                        <h3 style="margin: 0 0 10px 0; color: #dc2626;">⚠️ Top Cost Anomalies ({len(all_anomalies)} detected)</h3>
-                        <table>
-                            <tr><th>#</th><th>Team</th><th style="text-align: right;">Current Cost</th><th style="text-align: right;">Change</th></tr>
-                            {anomalies_html}
-                        </table>
-                    </div>
-                    
-                    <div class="ai-section">
-                        <h3 style="margin: 0 0 10px 0; color: #92400e;">💡 AI Optimization Recommendations</h3>
-                        <div style="white-space: pre-wrap;">{ai_rec_text}</div>
-                    </div>
-                    
-                    <h3 style="margin-top: 25px; color: #1e3a5f;">All Teams Cost Summary</h3>
-                    <table>
-                        <tr><th>Team</th><th>Account ID</th><th style="text-align: right;">Current</th><th style="text-align: right;">Change</th></tr>
-                        {teams_html}
-                    </table>
-                    
-                    <p style="margin-top: 20px; font-size: 12px; color: #9ca3af;">
-                        Generated by AWS Cost AI Agent v3.1.0 • Powered by Gemini 3 Flash
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+                                    ai_summary: str, ai_recommendations: Dict, org: Optional[Dict] = None) -> str:
+        # Analyses and anomalies always carry these keys (see CostAnalyzer._build_analysis, _process_team)
+        sorted_teams = sorted(all_teams_data, key=itemgetter('current_month_cost'), reverse=True)
+        
+        org = org or _summarize_org(all_teams_data)
+        
+        return ADMIN_EMAIL_TEMPLATE.render(
+            teams_count=len(all_teams_data),
+            anomalies_count=len(all_anomalies),
+            report_month=datetime.now().strftime('%B %Y'),
+            ai_summary=ai_summary,
+            ai_rec_text=ai_recommendations.get('org_recommendations', 'Configure GEMINI_API_KEY for AI recommendations'),
+            total_current=org['total_current'],
+            total_previous=org['total_previous'],
+            total_change=org['change'],
+            top_anomalies=heapq.nlargest(10, all_anomalies, key=itemgetter('percentage_change')),
+            sorted_teams=sorted_teams
+        )
 
 email_service = EmailService()
 
 # ==================== COST ANALYZER ====================
 
+@dataclass(frozen=True)
+class ReportDates:
+    """Month boundaries for one report run, computed once and shared by every team"""
+    current_start: str
+    current_end: str
+    previous_start: str
+    previous_end: str
+    current_month: str
+    previous_month: str
+    
+    @classmethod
+    def for_now(cls, now: Optional[datetime] = None) -> 'ReportDates':
+        now = now or datetime.now(timezone.utc)
+        previous_month_end = now.replace(day=1) - timedelta(days=1)
+        return cls(
+            current_start=now.replace(day=1).strftime("%Y-%m-%d"),
+            current_end=now.strftime("%Y-%m-%d"),
+            previous_start=previous_month_end.replace(day=1).strftime("%Y-%m-%d"),
+            previous_end=previous_month_end.strftime("%Y-%m-%d"),
+            current_month=now.strftime("%Y-%m"),
+            previous_month=previous_month_end.strftime("%Y-%m")
+        )
+
 class CostAnalyzer:
     """Analyzes cost data and detects anomalies with AI assistance"""
     
-    async def analyze_team_costs(self, team: Dict, threshold: float = 20.0) -> Dict:
+    async def analyze_team_costs(self, team: Dict, threshold: float = 20.0,
+                                 dates: Optional[ReportDates] = None) -> Dict:
         account_id = team['aws_account_id']
+        dates = dates or ReportDates.for_now()
         
-        now = datetime.now(timezone.utc)
-        current_month_start = now.replace(day=1).strftime("%Y-%m-%d")
-        previous_month_start = (now.replace(day=1) - timedelta(days=1)).replace(day=1).strftime("%Y-%m-%d")
-        previous_month_end = (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m-%d")
+        current_data, previous_data = await asyncio.gather(
+            datadog_service.get_cost_metrics(account_id, dates.current_start, dates.current_end),
+            datadog_service.get_cost_metrics(account_id, dates.previous_start, dates.previous_end)
+        )
+        
+        return self._build_analysis(team, current_data, previous_data, threshold, dates)
+    
+    async def analyze_teams(self, teams: List[Dict], threshold: float = 20.0,
+                            dates: Optional[ReportDates] = None) -> List[tuple]:
+        """
+        Analyze many teams with all Datadog fetches fanned out concurrently.
+        Returns (team, analysis) pairs in team order; teams whose fetch failed are logged and skipped.
+        """
+        dates = dates or ReportDates.for_now()
+        account_ids = [t['aws_account_id'] for t in teams]
         
-        current_data = await datadog_service.get_cost_metrics(account_id, current_month_start, now.strftime("%Y-%m-%d"))
-        previous_data = await datadog_service.get_cost_metrics(account_id, previous_month_start, previous_month_end)
+        current, previous = await asyncio.gather(
+            datadog_service.fetch_all(account_ids, dates.current_start, dates.current_end),
+            datadog_service.fetch_all(account_ids, dates.previous_start, dates.previous_end)
+        )
         
+        results = []
+        for team, current_result, previous_result in zip(teams, current, previous):
+            for result in (current_result, previous_result):
+                if isinstance(result, BaseException):
+                    logger.error(f"Error processing team {team.get('team_name', 'unknown')}: {result}")
+                    break
+            else:
+                results.append((team, self._build_analysis(team, current_result[1], previous_result[1], threshold, dates)))
+        return results
+    
+    def _build_analysis(self, team: Dict, current_data: Dict, previous_data: Dict,
+                        threshold: float, dates: ReportDates) -> Dict:
         current_cost = current_data.get('total_cost', 0)
         previous_cost = previous_data.get('total_cost', 0)
         
@@ -1372,15 +2085,15 @@ class CostAnalyzer:
         
         return {
             'team_name': team['team_name'],
-            'aws_account_id': account_id,
+            'aws_account_id': team['aws_account_id'],
             'current_month_cost': current_cost,
             'previous_month_cost': previous_cost,
             'percentage_change': round(percentage_change, 2),
             'is_anomaly': is_anomaly,
             'service_breakdown': current_data.get('service_breakdown', {}),
             'previous_service_breakdown': previous_data.get('service_breakdown', {}),
-            'current_month': now.strftime("%Y-%m"),
-            'previous_month': (now.replace(day=1) - timedelta(days=1)).strftime("%Y-%m"),
+            'current_month': dates.current_month,
+            'previous_month': dates.previous_month,
             'data_source': current_data.get('source', 'unknown')
         }
 
@@ -1388,103 +2101,184 @@ cost_analyzer = CostAnalyzer()
 
 # ==================== SCHEDULED JOB ====================
 
+# Max teams analyzed (AI calls) concurrently by the weekly job and the streamed admin preview
+ANALYSIS_CONCURRENCY = int(os.environ.get('ANALYSIS_CONCURRENCY', 10))
+
+async def _predict_cost(historical: List[Dict], team: Dict) -> Dict:
+    """
+    Cost prediction kept in storage for a week, keyed like the in-process cache on the
+    months and rounded costs the prompt sees: a retry or restart over the same history
+    skips the Gemini call. A run that saved a new cost record changes the history, so
+    the run after it predicts again.
+    """
+    team_name = team['team_name']
+    if not ai_service.api_key:
+        return await ai_service.predict_next_month_cost(historical, team_name)
+    
+    history_hash = ai_service.prediction_key(historical, team_name)
+    cached = await asyncio.to_thread(storage.get_ai_prediction, team['id'], history_hash)
+    if cached:
+        return cached
+    
+    prediction = await ai_service.predict_next_month_cost(historical, team_name)
+    # Only keep real model answers, not the basic-average fallback
+    if prediction.get('model') == ai_service.model_name:
+        await asyncio.to_thread(storage.save_ai_prediction, team['id'], history_hash, prediction)
+    return prediction
+
+async def _process_team(team: Dict, team_analysis: Dict, ai_enabled: bool,
+                        historical: List[Dict], run_at: str) -> tuple:
+    """
+    Run the AI steps for one analyzed team and build what the weekly job persists and sends.
+    Returns (anomaly or None, cost_record, email_job).
+    """
+    ai_analysis = {}
+    if ai_enabled:
+        ai_analysis = await ai_service.analyze_cost_anomaly(team_analysis)
+        
+        # Get cost prediction
+        if len(historical) >= 2:
+            ai_analysis['prediction'] = await _predict_cost(historical, team)
+    
+    anomaly = None
+    if team_analysis['is_anomaly']:
+        anomaly = {
+            'id': str(uuid.uuid4()),
+            'aws_account_id': team['aws_account_id'],
+            'team_name': team['team_name'],
+            'current_month': team_analysis['current_month'],
+            'current_cost': team_analysis['current_month_cost'],
+            'previous_month': team_analysis['previous_month'],
+            'previous_cost': team_analysis['previous_month_cost'],
+            'percentage_change': team_analysis['percentage_change'],
+            'is_anomaly': True,
+            'ai_explanation': ai_analysis.get('ai_analysis', ''),
+            'detected_at': run_at
+        }
+    
+    cost_record = {
+        'id': str(uuid.uuid4()),
+        'aws_account_id': team['aws_account_id'],
+        'team_name': team['team_name'],
+        'month': team_analysis['current_month'],
+        'total_cost': team_analysis['current_month_cost'],
+        'service_breakdown': team_analysis['service_breakdown'],
+        'ai_analysis': ai_analysis.get('ai_analysis', ''),
+        'fetched_at': run_at
+    }
+    
+    return anomaly, cost_record, email_service.build_team_report(team, team_analysis, ai_analysis)
+
 async def run_weekly_report():
     """Main scheduled job with AI analysis"""
     logger.info("Starting AI-powered weekly cost report generation...")
     
     try:
-        config = storage.get_config()
+        config = await asyncio.to_thread(storage.get_config)
         threshold = config.get('anomaly_threshold', 20.0)
         ai_enabled = config.get('ai_enabled', True)
         
-        teams = storage.get_all_teams()
+        teams = await asyncio.to_thread(storage.get_all_teams)
         if not teams:
             logger.warning("No teams configured, skipping report generation")
             return
         
         all_teams_data = []
         all_anomalies = []
-        
-        # Analyze each team
-        for team in teams:
-            try:
-                team_analysis = await cost_analyzer.analyze_team_costs(team, threshold)
-                
-                # Get AI analysis for each team
-                ai_analysis = {}
-                if ai_enabled:
-                    ai_analysis = await ai_service.analyze_cost_anomaly(team_analysis)
-                    
-                    # Get cost prediction
-                    historical = storage.get_team_cost_history(team['aws_account_id'], limit=12)
-                    if len(historical) >= 2:
-                        prediction = await ai_service.predict_next_month_cost(historical, team['team_name'])
-                        ai_analysis['prediction'] = prediction
-                
-                all_teams_data.append(team_analysis)
-                
-                # Send team report
-                await email_service.send_team_report(team, team_analysis, ai_analysis, config)
-                
-                # Track anomalies
-                if team_analysis['is_anomaly']:
-                    anomaly = {
-                        'id': str(uuid.uuid4()),
-                        'aws_account_id': team['aws_account_id'],
-                        'team_name': team['team_name'],
-                        'current_month': team_analysis['current_month'],
-                        'current_cost': team_analysis['current_month_cost'],
-                        'previous_month': team_analysis['previous_month'],
-                        'previous_cost': team_analysis['previous_month_cost'],
-                        'percentage_change': team_analysis['percentage_change'],
-                        'is_anomaly': True,
-                        'ai_explanation': ai_analysis.get('ai_analysis', ''),
-                        'detected_at': datetime.now(timezone.utc).isoformat()
-                    }
-                    all_anomalies.append(anomaly)
-                    storage.save_anomaly(anomaly)
-                
-                # Save cost record
-                cost_record = {
-                    'id': str(uuid.uuid4()),
-                    'aws_account_id': team['aws_account_id'],
-                    'team_name': team['team_name'],
-                    'month': team_analysis['current_month'],
-                    'total_cost': team_analysis['current_month_cost'],
-                    'service_breakdown': team_analysis['service_breakdown'],
-                    'ai_analysis': ai_analysis.get('ai_analysis', ''),
-                    'fetched_at': datetime.now(timezone.utc).isoformat()
-                }
-                storage.save_cost_record(cost_record)
-                
-            except Exception as e:
-                logger.error(f"Error processing team {team.get('team_name', 'unknown')}: {e}")
-        
-        # Generate AI insights for admin report
-        ai_summary = ""
-        ai_recommendations = {}
-        if ai_enabled:
-            ai_summary = await ai_service.generate_executive_summary(all_teams_data, all_anomalies)
-            ai_recommendations = await ai_service.generate_optimization_recommendations(all_teams_data)
-            
-            # Save AI insights
-            storage.save_ai_insight({
-                'type': 'weekly_report',
-                'executive_summary': ai_summary,
-                'recommendations': ai_recommendations,
-                'teams_analyzed': len(all_teams_data),
-                'anomalies_detected': len(all_anomalies),
-                'generated_at': datetime.now(timezone.utc).isoformat()
-            })
-        
-        # Send admin consolidated report
-        await email_service.send_admin_report(all_teams_data, all_anomalies, ai_summary, ai_recommendations, config)
+        email_jobs = []
+        # One timestamp for every record written by this run
+        run_at = datetime.now(timezone.utc).isoformat()
+        
+        # Load every team's cost history in one storage scan instead of one per team
+        histories = await asyncio.to_thread(storage.get_cost_histories, [t['aws_account_id'] for t in teams], limit=12) if ai_enabled else {}
+        
+        # Fetch cost data for all teams concurrently
+        analyzed = await cost_analyzer.analyze_teams(teams, threshold, ReportDates.for_now())
+        
+        # Run the per-team AI steps concurrently, bounded to keep Gemini within rate limits
+        semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+        
+        async def process(team: Dict, team_analysis: Dict) -> tuple:
+            async with semaphore:
+                return await _process_team(team, team_analysis, ai_enabled,
+                                           histories.get(team['aws_account_id'], []), run_at)
+        
+        results = await asyncio.gather(*[process(t, a) for t, a in analyzed], return_exceptions=True)
+        
+        cost_records = []
+        for (team, team_analysis), result in zip(analyzed, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing team {team.get('team_name', 'unknown')}: {result}")
+                continue
+            anomaly, cost_record, email_job = result
+            all_teams_data.append(team_analysis)
+            if anomaly:
+                all_anomalies.append(anomaly)
+            cost_records.append(cost_record)
+            email_jobs.append(email_job)
+        
+        # Team reports don't depend on the org summary: send them over one SMTP session
+        # in the background while records are saved and the admin summary is generated
+        team_emails = asyncio.create_task(email_service.send_batch(email_jobs))
+        try:
+            await _finish_weekly_report(config, ai_enabled, all_teams_data, all_anomalies, cost_records, run_at)
+        finally:
+            await team_emails
         
         logger.info(f"Weekly report completed. Processed {len(teams)} teams, found {len(all_anomalies)} anomalies")
         
     except Exception as e:
         logger.error(f"Weekly report job failed: {e}")
 
+async def _finish_weekly_report(config: Dict, ai_enabled: bool, all_teams_data: List[Dict],
+                                all_anomalies: List[Dict], cost_records: List[Dict], run_at: str):
+    """Persist the run's records, generate the org-level AI insights and send the admin report"""
+    # Persist anomalies and cost records as two batches of concurrent PUTs, in the
+    # background: nothing below reads them back, so the S3 writes overlap the Gemini calls
+    writes = asyncio.gather(
+        asyncio.to_thread(storage.save_anomalies, all_anomalies),
+        asyncio.to_thread(storage.save_cost_records, cost_records)
+    )
+    try:
+        await _send_org_report(config, ai_enabled, all_teams_data, all_anomalies, run_at)
+    finally:
+        await writes
+
+async def _generate_org_insights(all_teams_data: List[Dict], all_anomalies: List[Dict],
+                                 org: Dict) -> tuple:
+    """(executive summary, recommendations); independent Gemini calls, so they run side by side"""
+    return await asyncio.gather(
+        ai_service.generate_executive_summary(all_teams_data, all_anomalies, org),
+        ai_service.generate_optimization_recommendations(all_teams_data, org)
+    )
+
+async def _send_org_report(config: Dict, ai_enabled: bool, all_teams_data: List[Dict],
+                           all_anomalies: List[Dict], run_at: str):
+    """Generate the org-level AI insights and send the admin report"""
+    # Generate AI insights for admin report
+    ai_summary = ""
+    ai_recommendations = {}
+    # Shared by both prompts and the admin email
+    org = _summarize_org(all_teams_data)
+    if ai_enabled:
+        ai_summary, ai_recommendations = await _generate_org_insights(all_teams_data, all_anomalies, org)
+        
+        # Save AI insights
+        await asyncio.to_thread(storage.save_ai_insight, {
+            'type': 'weekly_report',
+            'executive_summary': ai_summary,
+            'recommendations': ai_recommendations,
+            'teams_analyzed': len(all_teams_data),
+            'anomalies_detected': len(all_anomalies),
+            'generated_at': run_at
+        })
+    
+    # Send admin consolidated report
+    admin_job = email_service.build_admin_report(all_teams_data, all_anomalies, ai_summary, ai_recommendations,
+                                                 config, org)
+    if admin_job:
+        await email_service.send_batch([admin_job])
+
 # ==================== API ROUTES ====================
 
 # PUBLIC ENDPOINTS (no auth required)
@@ -1505,6 +2299,7 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "storage": "S3" if storage.use_s3 else "Local",
+        "storage_cache": {"hits": storage.cache_hits, "misses": storage.cache_misses},
         "ai_configured": bool(ai_service.api_key),
         "datadog_configured": bool(datadog_service.api_key and datadog_service.app_key),
         "smtp_configured": bool(os.environ.get('SMTP_HOST'))
@@ -1512,94 +2307,184 @@ async def health_check():
 
 # PROTECTED ENDPOINTS (require API key)
 
+# Preview ETags: bumped by every endpoint that changes teams or config
+PREVIEW_CACHE_CONTROL = "private, max-age=30"
+_teams_version = 0
+_config_version = 0
+# The counters restart at 0 with the process; the nonce keeps a restarted server from
+# rebuilding an ETag a client cached before a change and answering it with 304
+_PROCESS_NONCE = uuid.uuid4().hex
+
+def _bump_teams_version():
+    global _teams_version
+    _teams_version += 1
+
+def _bump_config_version():
+    global _config_version
+    _config_version += 1
+
+def _preview_inputs() -> tuple:
+    """State every preview depends on; also rolls over daily since cost data changes day to day"""
+    return (_teams_version, _config_version, _cache_epoch, datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+
+def _preview_etag(*parts: Any) -> str:
+    """ETag for a preview of the current _preview_inputs()"""
+    raw = ":".join(str(p) for p in (_PROCESS_NONCE, *_preview_inputs(), *parts))
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+# Server-side copy of rendered previews, keyed by ETag: the ETag already changes with
+# teams, config and the day, so a hit is a response for identical inputs
+PREVIEW_CACHE_TTL = float(os.environ.get('PREVIEW_CACHE_TTL', 1800))
+_preview_cache: Dict[str, tuple] = {}
+# Bumped by /cache/invalidate so clients' ETags stop matching too
+_cache_epoch = 0
+
+def _get_cached_preview(etag: str) -> Optional[Dict]:
+    cached = _preview_cache.get(etag)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+def _cache_preview(etag: str, payload: Dict):
+    global _preview_cache
+    now = time.monotonic()
+    if len(_preview_cache) >= 256:
+        _preview_cache = {k: v for k, v in _preview_cache.items() if v[0] > now}
+    _preview_cache[etag] = (now + PREVIEW_CACHE_TTL, payload)
+
+# Previews in flight, keyed by ETag: identical concurrent requests (several tabs,
+# or a click racing the prefetch) share one computation, and once it finishes the
+# preview cache serves the same ETag. A change to teams or config moves the ETag,
+# so it never joins a computation started for the old inputs
+_preview_inflight: Dict[str, asyncio.Task] = {}
+
+async def _single_flight_preview(etag: str, compute) -> Dict[str, Any]:
+    task = _preview_inflight.get(etag)
+    if task is None:
+        task = asyncio.create_task(compute())
+        _preview_inflight[etag] = task
+        task.add_done_callback(lambda _: _preview_inflight.pop(etag, None))
+    # Shield so one client disconnecting doesn't cancel the computation for the others
+    preview = await asyncio.shield(task)
+    _cache_preview(etag, preview)
+    return preview
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    # If-None-Match may list several ETags, and proxies may hand back weak (W/) ones
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" in candidates or etag in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL})
+    return None
+
 # Team Management
 @api_router.post("/teams")
 async def create_team(team_input: TeamCreate, _: bool = Depends(verify_api_key)):
     team = Team(**team_input.model_dump())
-    team_dict = team.model_dump()
-    team_dict['created_at'] = team_dict['created_at'].isoformat()
-    storage.add_team(team_dict)
+    await asyncio.to_thread(storage.add_team, team.model_dump(mode='json'))
+    _bump_teams_version()
     return team
 
 @api_router.get("/teams")
-async def get_all_teams(_: bool = Depends(verify_api_key)):
-    return storage.get_all_teams()
+async def get_all_teams(response: Response, limit: Optional[int] = Query(default=None, ge=1, le=1000),
+                        offset: int = Query(default=0, ge=0), _: bool = Depends(verify_api_key)):
+    """All teams, or one page of them with ?limit=&offset= (total and next offset in headers)"""
+    teams = await asyncio.to_thread(storage.get_all_teams)
+    if limit is None:
+        return teams
+    
+    response.headers["X-Total-Count"] = str(len(teams))
+    if offset + limit < len(teams):
+        response.headers["X-Next-Offset"] = str(offset + limit)
+    return teams[offset:offset + limit]
 
 @api_router.get("/teams/{team_id}")
 async def get_team(team_id: str, _: bool = Depends(verify_api_key)):
-    team = storage.get_team_by_id(team_id)
+    team = await asyncio.to_thread(storage.get_team_by_id, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     return team
 
 @api_router.delete("/teams/{team_id}")
-async def delete_team(team_id: str, _: bool = Depends(verify_api_key)):
-    success = storage.delete_team(team_id)
+async def delete_team(team_id: str, purge_history: bool = Query(False),
+                      _: bool = Depends(verify_api_key)):
+    team = await asyncio.to_thread(storage.get_team_by_id, team_id)
+    success = await asyncio.to_thread(storage.delete_team, team_id)
     if not success:
         raise HTTPException(status_code=404, detail="Team not found")
+    _bump_teams_version()
+    if purge_history and team:
+        purged = await asyncio.to_thread(storage.purge_cost_history, team['aws_account_id'])
+        return {"message": "Team deleted successfully", "cost_records_deleted": purged}
     return {"message": "Team deleted successfully"}
 
 @api_router.post("/teams/bulk")
 async def bulk_create_teams(teams: List[TeamCreate], _: bool = Depends(verify_api_key)):
-    created_teams = []
-    for team_input in teams:
-        team = Team(**team_input.model_dump())
-        team_dict = team.model_dump()
-        team_dict['created_at'] = team_dict['created_at'].isoformat()
-        storage.add_team(team_dict)
-        created_teams.append(team)
+    created_teams = [Team(**team_input.model_dump()) for team_input in teams]
+    # One teams.json write for the whole batch
+    await asyncio.to_thread(storage.add_teams, [team.model_dump(mode='json') for team in created_teams])
+    _bump_teams_version()
     return {"message": f"Created {len(created_teams)} teams", "teams": created_teams}
 
 # Configuration
 @api_router.get("/config")
 async def get_config(_: bool = Depends(verify_api_key)):
-    return storage.get_config()
+    return await asyncio.to_thread(storage.get_config)
 
 @api_router.put("/config")
 async def update_config(config_update: NotificationConfigUpdate, _: bool = Depends(verify_api_key)):
-    current_config = storage.get_config()
+    current_config = await asyncio.to_thread(storage.get_config)
     update_data = {k: v for k, v in config_update.model_dump().items() if v is not None}
+    schedule_changed = any(
+        k in update_data and update_data[k] != current_config.get(k)
+        for k in ('schedule_day', 'schedule_hour')
+    )
     current_config.update(update_data)
-    storage.save_config(current_config)
+    await asyncio.to_thread(storage.save_config, current_config)
+    _bump_config_version()
     
-    if 'schedule_day' in update_data or 'schedule_hour' in update_data:
+    if schedule_changed:
         reschedule_weekly_job(current_config)
     
     return {"message": "Configuration updated successfully"}
 
 # Cost Data
-@api_router.get("/costs/history")
+# Stored records are already plain JSON dicts, so these return ORJSONResponse directly
+# and skip FastAPI's jsonable_encoder walk over every record
+@api_router.get("/costs/history", response_model=None)
 async def get_cost_history(team_name: Optional[str] = None, month: Optional[str] = None, 
                            limit: int = Query(default=100, le=1000), _: bool = Depends(verify_api_key)):
-    return storage.get_cost_history(team_name, month, limit)
+    return ORJSONResponse(await asyncio.to_thread(storage.get_cost_history, team_name, month, limit))
 
-@api_router.get("/anomalies")
+@api_router.get("/anomalies", response_model=None)
 async def get_anomalies(team_name: Optional[str] = None, limit: int = Query(default=50, le=500),
                         _: bool = Depends(verify_api_key)):
-    return storage.get_anomalies(team_name, limit)
+    return ORJSONResponse(await asyncio.to_thread(storage.get_anomalies, team_name, limit))
 
 # AI Endpoints
-@api_router.get("/ai/insights")
+@api_router.get("/ai/insights", response_model=None)
 async def get_ai_insights(limit: int = Query(default=20, le=100), _: bool = Depends(verify_api_key)):
     """Get historical AI insights"""
-    return storage.get_ai_insights(limit)
+    return ORJSONResponse(await asyncio.to_thread(storage.get_ai_insights, limit))
 
 @api_router.post("/ai/analyze/{team_id}")
 async def analyze_team_with_ai(team_id: str, _: bool = Depends(verify_api_key)):
     """Run AI analysis for a specific team"""
-    team = storage.get_team_by_id(team_id)
+    team = await asyncio.to_thread(storage.get_team_by_id, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    config = storage.get_config()
+    config = await asyncio.to_thread(storage.get_config)
     threshold = config.get('anomaly_threshold', 20.0)
     
     team_analysis = await cost_analyzer.analyze_team_costs(team, threshold)
     ai_analysis = await ai_service.analyze_cost_anomaly(team_analysis)
     
     # Get prediction
-    historical = storage.get_team_cost_history(team['aws_account_id'], limit=12)
-    prediction = await ai_service.predict_next_month_cost(historical, team['team_name'])
+    historical = await asyncio.to_thread(storage.get_team_cost_history, team['aws_account_id'], limit=12)
+    prediction = await _predict_cost(historical, team)
     
     return {
         "team": team,
@@ -1611,11 +2496,11 @@ async def analyze_team_with_ai(team_id: str, _: bool = Depends(verify_api_key)):
 @api_router.get("/ai/recommendations")
 async def get_org_recommendations(_: bool = Depends(verify_api_key)):
     """Get AI-powered organization-wide recommendations"""
-    teams = storage.get_all_teams()
+    teams = await asyncio.to_thread(storage.get_all_teams)
     if not teams:
         raise HTTPException(status_code=404, detail="No teams configured")
     
-    config = storage.get_config()
+    config = await asyncio.to_thread(storage.get_config)
     threshold = config.get('anomaly_threshold', 20.0)
     
     all_teams_data = []
@@ -1627,38 +2512,88 @@ async def get_org_recommendations(_: bool = Depends(verify_api_key)):
     return recommendations
 
 # Manual Triggers
-@api_router.post("/trigger/weekly-report")
-async def trigger_weekly_report(background_tasks: BackgroundTasks, _: bool = Depends(verify_api_key)):
-    background_tasks.add_task(run_weekly_report)
+# Report jobs run one at a time on a single worker; a job that is already queued or
+# running isn't queued again, so repeat clicks (or a click during the cron run) coalesce
+_report_queue: Optional[asyncio.Queue] = None
+_report_worker_task: Optional[asyncio.Task] = None
+_report_jobs_pending: set = set()
+
+def _enqueue_report(key: str, job) -> bool:
+    """Queue `job` (a coroutine function) under `key`; returns False if that key is already pending"""
+    if key in _report_jobs_pending:
+        return False
+    _report_jobs_pending.add(key)
+    _report_queue.put_nowait((key, job))
+    return True
+
+async def _report_worker():
+    while True:
+        key, job = await _report_queue.get()
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Report job {key} failed: {e}")
+        finally:
+            _report_jobs_pending.discard(key)
+            _report_queue.task_done()
+
+async def scheduled_weekly_report():
+    """Cron entrypoint: goes through the queue so it can't overlap a manual run"""
+    if not _enqueue_report("weekly", run_weekly_report):
+        logger.info("Weekly report already queued or running, skipping scheduled run")
+
+# Trigger endpoints only queue the job, so they answer 202 Accepted right away
+@api_router.post("/trigger/weekly-report", status_code=202)
+async def trigger_weekly_report(_: bool = Depends(verify_api_key)):
+    if not _enqueue_report("weekly", run_weekly_report):
+        return {"message": "Weekly report generation is already running", "status": "already_running"}
     return {"message": "AI-powered weekly report generation triggered", "status": "processing"}
 
-@api_router.post("/trigger/team-report/{team_id}")
-async def trigger_team_report(team_id: str, background_tasks: BackgroundTasks, _: bool = Depends(verify_api_key)):
-    team = storage.get_team_by_id(team_id)
+@api_router.post("/trigger/team-report/{team_id}", status_code=202)
+async def trigger_team_report(team_id: str, _: bool = Depends(verify_api_key)):
+    team = await asyncio.to_thread(storage.get_team_by_id, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
     async def generate_single_report():
-        config = storage.get_config()
+        config = await asyncio.to_thread(storage.get_config)
         threshold = config.get('anomaly_threshold', 20.0)
         team_analysis = await cost_analyzer.analyze_team_costs(team, threshold)
         ai_analysis = await ai_service.analyze_cost_anomaly(team_analysis)
         await email_service.send_team_report(team, team_analysis, ai_analysis, config)
     
-    background_tasks.add_task(generate_single_report)
+    if not _enqueue_report(f"team:{team_id}", generate_single_report):
+        return {"message": f"AI report for team {team['team_name']} is already queued", "status": "already_running"}
     return {"message": f"AI report triggered for team {team['team_name']}", "status": "processing"}
 
 @api_router.get("/preview/team-report/{team_id}")
-async def preview_team_report(team_id: str, _: bool = Depends(verify_api_key)):
-    team = storage.get_team_by_id(team_id)
+async def preview_team_report(team_id: str, request: Request, response: Response,
+                              _: bool = Depends(verify_api_key)):
+    etag = _preview_etag("team", team_id)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PREVIEW_CACHE_CONTROL
+    cached = _get_cached_preview(etag)
+    if cached:
+        return cached
+    
+    return await _single_flight_preview(etag, lambda: _compute_team_preview(team_id))
+
+async def _compute_team_preview(team_id: str) -> Dict[str, Any]:
+    team = await asyncio.to_thread(storage.get_team_by_id, team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    config = storage.get_config()
+    config = await asyncio.to_thread(storage.get_config)
     threshold = config.get('anomaly_threshold', 20.0)
     team_analysis = await cost_analyzer.analyze_team_costs(team, threshold)
+    return await _build_team_preview(team, team_analysis)
+
+async def _build_team_preview(team: Dict, team_analysis: Dict) -> Dict[str, Any]:
     ai_analysis = await ai_service.analyze_cost_anomaly(team_analysis)
-    
     return {
         "team": team,
         "analysis": team_analysis,
@@ -1666,31 +2601,105 @@ async def preview_team_report(team_id: str, _: bool = Depends(verify_api_key)):
         "email_preview": email_service._generate_team_email_html(team, team_analysis, ai_analysis)
     }
 
+# After an admin preview, the next click is almost always an anomalous team's preview,
+# so those are built in the background from the analyses just computed
+PREVIEW_PREFETCH_LIMIT = int(os.environ.get('PREVIEW_PREFETCH_LIMIT', 10))
+_prefetch_tasks: set = set()
+
+async def _warm_team_preview(team: Dict, team_analysis: Dict, inputs: tuple):
+    # The analysis is from an admin preview over `inputs`; after a team/config change it
+    # would be cached under the new ETag, so leave that preview to be computed on demand
+    if _preview_inputs() != inputs:
+        return
+    etag = _preview_etag("team", team['id'])
+    if _get_cached_preview(etag):
+        return
+    try:
+        await _single_flight_preview(etag, lambda: _build_team_preview(team, team_analysis))
+    except Exception as e:
+        logger.warning(f"Prefetching preview for team {team['team_name']} failed: {e}")
+
+def _prefetch_team_previews(analyzed: List[tuple], inputs: tuple):
+    anomalous = [(team, analysis) for team, analysis in analyzed if analysis['is_anomaly']]
+    for team, team_analysis in anomalous[:PREVIEW_PREFETCH_LIMIT]:
+        task = asyncio.create_task(_warm_team_preview(team, team_analysis, inputs))
+        # Hold a reference so the task isn't garbage-collected before it finishes
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+
 @api_router.get("/preview/admin-report")
-async def preview_admin_report(_: bool = Depends(verify_api_key)):
-    teams = storage.get_all_teams()
+async def preview_admin_report(request: Request, response: Response, _: bool = Depends(verify_api_key)):
+    etag = _preview_etag("admin")
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PREVIEW_CACHE_CONTROL
+    cached = _get_cached_preview(etag)
+    if cached:
+        return cached
+    
+    return await _single_flight_preview(etag, _build_admin_preview)
+
+async def _iter_team_analyses(teams: List[Dict], threshold: float) -> AsyncIterator[tuple]:
+    """
+    Yield (team, analysis) as each team's analysis completes, at most ANALYSIS_CONCURRENCY
+    at a time. Datadog results are cached per account and range, so a preview followed by
+    a trigger only fetches each team once. Failed teams are logged and skipped; closing
+    the generator early cancels the analyses still running.
+    """
+    semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+    dates = ReportDates.for_now()
+    
+    async def analyze(team: Dict) -> Optional[tuple]:
+        async with semaphore:
+            try:
+                return team, await cost_analyzer.analyze_team_costs(team, threshold, dates)
+            except Exception as e:
+                logger.error(f"Error analyzing team {team.get('team_name', 'unknown')} for admin preview: {e}")
+                return None
+    
+    tasks = [asyncio.create_task(analyze(team)) for team in teams]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result is not None:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _preview_anomaly(team: Dict, team_analysis: Dict) -> Dict:
+    return {
+        'team_name': team['team_name'],
+        'current_cost': team_analysis['current_month_cost'],
+        'percentage_change': team_analysis['percentage_change']
+    }
+
+async def _build_admin_preview() -> Dict[str, Any]:
+    # Captured before reading teams/config, so a change made meanwhile disables the prefetch
+    inputs = _preview_inputs()
+    teams = await asyncio.to_thread(storage.get_all_teams)
     if not teams:
         raise HTTPException(status_code=404, detail="No teams configured")
     
-    config = storage.get_config()
+    config = await asyncio.to_thread(storage.get_config)
     threshold = config.get('anomaly_threshold', 20.0)
     
-    all_teams_data = []
-    all_anomalies = []
+    # Same analysis as the streamed preview, collected back into team order
+    position = {id(team): i for i, team in enumerate(teams)}
+    analyzed = [pair async for pair in _iter_team_analyses(teams, threshold)]
+    analyzed.sort(key=lambda pair: position[id(pair[0])])
+    all_teams_data = [team_analysis for _, team_analysis in analyzed]
+    all_anomalies = [_preview_anomaly(team, team_analysis)
+                     for team, team_analysis in analyzed if team_analysis['is_anomaly']]
     
-    for team in teams:
-        team_analysis = await cost_analyzer.analyze_team_costs(team, threshold)
-        all_teams_data.append(team_analysis)
-        
-        if team_analysis['is_anomaly']:
-            all_anomalies.append({
-                'team_name': team['team_name'],
-                'current_cost': team_analysis['current_month_cost'],
-                'percentage_change': team_analysis['percentage_change']
-            })
+    if PREVIEW_PREFETCH_LIMIT > 0:
+        _prefetch_team_previews(analyzed, inputs)
     
-    ai_summary = await ai_service.generate_executive_summary(all_teams_data, all_anomalies)
-    ai_recommendations = await ai_service.generate_optimization_recommendations(all_teams_data)
+    ai_summary, ai_recommendations = await _generate_org_insights(
+        all_teams_data, all_anomalies, _summarize_org(all_teams_data))
     
     return {
         "teams_count": len(teams),
@@ -1701,9 +2710,73 @@ async def preview_admin_report(_: bool = Depends(verify_api_key)):
         "anomalies": all_anomalies
     }
 
+@api_router.get("/preview/admin-report/stream")
+async def stream_admin_report(_: bool = Depends(verify_api_key)):
+    """
+    Stream the admin preview as NDJSON: one line per team as soon as its analysis
+    completes, followed by a summary line with the AI executive summary.
+    """
+    teams = await asyncio.to_thread(storage.get_all_teams)
+    if not teams:
+        raise HTTPException(status_code=404, detail="No teams configured")
+    
+    config = await asyncio.to_thread(storage.get_config)
+    threshold = config.get('anomaly_threshold', 20.0)
+    
+    async def generate():
+        all_teams_data = []
+        all_anomalies = []
+        # aclosing: a client that goes away mid-stream cancels the analyses still running
+        async with aclosing(_iter_team_analyses(teams, threshold)) as analyses:
+            async for team, team_analysis in analyses:
+                all_teams_data.append(team_analysis)
+                if team_analysis['is_anomaly']:
+                    all_anomalies.append(_preview_anomaly(team, team_analysis))
+                yield orjson.dumps({"type": "team", "data": team_analysis}, default=str) + b"\n"
+        
+        ai_summary, ai_recommendations = await _generate_org_insights(
+            all_teams_data, all_anomalies, _summarize_org(all_teams_data))
+        yield orjson.dumps({
+            "type": "summary",
+            "teams_count": len(teams),
+            "anomalies_count": len(all_anomalies),
+            "ai_summary": ai_summary,
+            "ai_recommendations": ai_recommendations,
+            "anomalies": all_anomalies
+        }, default=str) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@api_router.post("/cache/invalidate")
+async def invalidate_caches(_: bool = Depends(verify_api_key)):
+    """Drop cached previews, Datadog results and AI answers so the next request recomputes"""
+    global _cache_epoch
+    previews = len(_preview_cache)
+    _preview_cache.clear()
+    _cache_epoch += 1
+    datadog_service.clear_cache()
+    ai_service.clear_cache()
+    return {"message": "Caches invalidated", "previews_dropped": previews}
+
 # Scheduler Status
+# Scheduler status only changes on reschedule or when a job fires, so the response is
+# kept until then instead of being rebuilt for every dashboard poll
+_scheduler_status_cache: Optional[Dict] = None
+_scheduler_status_valid_until: Optional[datetime] = None
+
+def _invalidate_scheduler_status():
+    global _scheduler_status_cache
+    _scheduler_status_cache = None
+
 @api_router.get("/scheduler/status")
 async def get_scheduler_status(_: bool = Depends(verify_api_key)):
+    global _scheduler_status_cache, _scheduler_status_valid_until
+    if (_scheduler_status_cache is not None
+            and _scheduler_status_cache["running"] == scheduler.running
+            and (_scheduler_status_valid_until is None
+                 or datetime.now(timezone.utc) < _scheduler_status_valid_until)):
+        return _scheduler_status_cache
+    
     jobs = scheduler.get_jobs()
     job_info = []
     for job in jobs:
@@ -1714,13 +2787,17 @@ async def get_scheduler_status(_: bool = Depends(verify_api_key)):
             "timezone": str(job.next_run_time.tzinfo) if job.next_run_time else "UTC"
         })
     
-    return {
+    _scheduler_status_cache = {
         "running": scheduler.running,
         "jobs": job_info,
         "scheduler_timezone": "UTC",
         "ai_model": "gemini-1.5-flash",
         "ai_configured": bool(ai_service.api_key)
     }
+    # Valid until the next job fires and its next_run_time moves on
+    run_times = [job.next_run_time for job in jobs if job.next_run_time]
+    _scheduler_status_valid_until = min(run_times) if run_times else None
+    return _scheduler_status_cache
 
 @api_router.get("/storage/info")
 async def get_storage_info(_: bool = Depends(verify_api_key)):
@@ -1735,37 +2812,42 @@ async def get_storage_info(_: bool = Depends(verify_api_key)):
 # Include router
 app.include_router(api_router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 # ==================== SCHEDULER SETUP ====================
 
+_DAY_MAP = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2,
+    'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
 def reschedule_weekly_job(config: Dict):
     """Schedule weekly job with explicit UTC timezone"""
     try:
-        if scheduler.get_job('weekly_cost_report'):
-            scheduler.remove_job('weekly_cost_report')
-        
-        day_map = {
-            'monday': 0, 'tuesday': 1, 'wednesday': 2,
-            'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6
-        }
-        
         day = config.get('schedule_day', 'monday').lower()
         hour = config.get('schedule_hour', 9)
+        if day not in _DAY_MAP:
+            # API input is validated; this only catches bad SCHEDULE_DAY env values or old stored configs
+            logger.warning(f"Unknown schedule_day '{day}', falling back to monday")
+            day = 'monday'
+        
+        trigger = CronTrigger(day_of_week=_DAY_MAP[day], hour=hour, minute=0, timezone='UTC')
+        existing = scheduler.get_job('weekly_cost_report')
+        # Config saves that don't touch the schedule leave the job alone.
+        # CronTrigger has no __eq__, but its repr lists every field and the timezone
+        if existing and repr(existing.trigger) == repr(trigger):
+            return
         
-        scheduler.add_job(
-            run_weekly_report,
-            CronTrigger(day_of_week=day_map.get(day, 0), hour=hour, minute=0, timezone='UTC'),
-            id='weekly_cost_report',
-            name='Weekly AI Cost Report',
-            replace_existing=True
-        )
+        _invalidate_scheduler_status()
+        if existing:
+            # Swap the trigger in place; the job is never absent from the jobstore
+            scheduler.reschedule_job('weekly_cost_report', trigger=trigger)
+        else:
+            scheduler.add_job(
+                scheduled_weekly_report,
+                trigger,
+                id='weekly_cost_report',
+                name='Weekly AI Cost Report',
+                replace_existing=True
+            )
         
         logger.info(f"Scheduled AI-powered weekly report for {day} at {hour}:00 UTC")
         
@@ -1774,6 +2856,10 @@ def reschedule_weekly_job(config: Dict):
 
 @app.on_event("startup")
 async def startup_event():
+    global _report_queue, _report_worker_task
+    _report_queue = asyncio.Queue()
+    _report_worker_task = asyncio.create_task(_report_worker())
+    
     config = storage.get_config()
     reschedule_weekly_job(config)
     scheduler.start()
@@ -1788,4 +2874,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     scheduler.shutdown()
+    if _report_worker_task:
+        _report_worker_task.cancel()
+    await datadog_service.close()
     logger.info("AWS Cost AI Agent stopped")
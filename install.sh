@@ -260,6 +260,8 @@ pip install --quiet \
     email-validator \
     apscheduler \
     httpx \
+    orjson \
+    jinja2 \
     boto3 \
     google-generativeai
 